@@ -1,16 +1,22 @@
 import os
+from typing import TYPE_CHECKING
 
-from openai.types.audio import TranscriptionVerbose
+import numpy as np
 
 from analysis_tool.audio.openai_api import generate_transcript_from_mp3
 from analysis_tool.params import AUDIO_FILES_PATH
 
+if TYPE_CHECKING:
+    from openai.types.audio import TranscriptionVerbose
+
 
 class AudioParser:
-    def __init__(self, file_name: str):
+    def __init__(self, file_name: str, decibels: np.ndarray | None = None):
         self.file_name: str = file_name
         self.file_path: str = os.path.join(AUDIO_FILES_PATH, file_name)
-        self.transcript: TranscriptionVerbose = self.extract_transcript()
+        # Loudness of the audio chunks, when already read, finds pauses to split at
+        self.decibels = decibels
+        self.transcript: "TranscriptionVerbose" = self.extract_transcript()
 
-    def extract_transcript(self) -> TranscriptionVerbose:
-        return generate_transcript_from_mp3(self.file_name)
+    def extract_transcript(self) -> "TranscriptionVerbose":
+        return generate_transcript_from_mp3(self.file_name, self.decibels)
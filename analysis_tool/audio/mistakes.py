@@ -1,16 +1,40 @@
+import numpy as np
+
 from analysis_tool.audio.audio_parser import AudioParser
-from analysis_tool.audio.volume_analyzer import AudioVolumeAnalyzer
+from analysis_tool.audio.spectral import spectral_features
+from analysis_tool.audio.volume_analyzer import (
+    AudioVolumeAnalyzer,
+    FragmentSegmenter,
+    chunk_decibels,
+)
 from analysis_tool.mistakes.mistakes import MistakeCategory, MistakeType
 from analysis_tool.mistakes.models import Mistake
 
 
-def get_audio_mistakes(audio: AudioParser) -> list[Mistake]:
-    volume_analyzer = AudioVolumeAnalyzer(audio.file_name)
+def get_audio_mistakes(
+    audio: AudioParser, volume_analyzer: AudioVolumeAnalyzer | None = None
+) -> list[Mistake]:
+    volume_analyzer = volume_analyzer or AudioVolumeAnalyzer(audio.file_name)
 
     volume_mistakes = get_volume_mistakes(volume_analyzer)
     return volume_mistakes
 
 
+def _to_mistakes(
+    mistake_type: MistakeType, fragments: list[tuple[float, float]]
+) -> list[Mistake]:
+    return [
+        Mistake(
+            mistake_type,
+            MistakeCategory.AUDIO,
+            confidence=1,
+            start_ts=start_ts,
+            end_ts=end_ts,
+        )
+        for start_ts, end_ts in fragments
+    ]
+
+
 def get_volume_mistakes(volume: AudioVolumeAnalyzer) -> list[Mistake]:
     mistakes = []
 
@@ -18,18 +42,52 @@ def get_volume_mistakes(volume: AudioVolumeAnalyzer) -> list[Mistake]:
         (MistakeType.SPEAKING_LOUD, volume.get_too_loud_fragments),
         (MistakeType.NOISE, volume.get_high_noise_fragments),
         (MistakeType.SPEAKING_QUIETLY, volume.get_too_quiet_fragments),
+        (MistakeType.ACCENTUATION, volume.get_monotone_fragments),
     ]
     for mistake_type, generate_mistakes_func in data_to_capture:
-        data = generate_mistakes_func()
-        for start_ts, end_ts in data:
-            mistakes.append(
-                Mistake(
-                    mistake_type,
-                    MistakeCategory.AUDIO,
-                    confidence=1,
-                    start_ts=start_ts,
-                    end_ts=end_ts,
-                )
-            )
+        mistakes.extend(_to_mistakes(mistake_type, generate_mistakes_func()))
 
     return mistakes
+
+
+class VolumeMistakesStream:
+    """Volume mistakes of live audio, pushed chunk by chunk (`CHUNK_LENGTH_MS` each)"""
+
+    def __init__(self) -> None:
+        self.mistake_types = [
+            MistakeType.SPEAKING_LOUD,
+            MistakeType.NOISE,
+            MistakeType.SPEAKING_QUIETLY,
+        ]
+        self.segmenters = [FragmentSegmenter() for _ in self.mistake_types]
+        # Quietest chunk heard so far stands for the ambient noise
+        self.ambient_noise = np.inf
+
+    def push(self, samples: np.ndarray, frame_rate: int) -> list[Mistake]:
+        """`samples` of one mono chunk, as int16"""
+        chunks = samples[None, :]
+        decibels = chunk_decibels(chunks, np.array([chunks.shape[1]]))
+        if decibels[0] != -np.inf:
+            self.ambient_noise = min(self.ambient_noise, decibels[0])
+
+        matches = [
+            AudioVolumeAnalyzer._is_too_loud(decibels),
+            AudioVolumeAnalyzer._is_ambient_noise_too_loud(
+                spectral_features(chunks, frame_rate)
+            ),
+            AudioVolumeAnalyzer._is_too_low(decibels, self.ambient_noise),
+        ]
+
+        mistakes = []
+        for mistake_type, segmenter, chunk_matches in zip(
+            self.mistake_types, self.segmenters, matches
+        ):
+            fragments = segmenter.push(bool(chunk_matches[0]))
+            mistakes.extend(_to_mistakes(mistake_type, fragments))
+        return mistakes
+
+    def finish(self) -> list[Mistake]:
+        mistakes = []
+        for mistake_type, segmenter in zip(self.mistake_types, self.segmenters):
+            mistakes.extend(_to_mistakes(mistake_type, segmenter.finish()))
+        return mistakes
@@ -1,79 +1,219 @@
 import ast
+import asyncio
 import os
-import pickle
+import re
+from typing import TYPE_CHECKING
 
-from openai import OpenAI
-from openai.types.audio import TranscriptionVerbose, TranscriptionWord
+import numpy as np
 
-from analysis_tool.params import load_envs, PROJECT_ROOT, AUDIO_FILES_PATH
-
-TRANSCRIPT_CACHE_PATH = os.path.join(
-    PROJECT_ROOT, "analysis_tool", "audio", "transcript_cache"
+from analysis_tool.audio.pcm import decode_to_wav, encode_part
+from analysis_tool.audio.transcript_cache import (
+    load_transcript,
+    save_transcript,
+    transcript_key,
+)
+from analysis_tool.audio.transcription import (
+    chunking_params,
+    merge_transcripts,
+    split_at_silences,
 )
+from analysis_tool.audio.volume_analyzer import read_volume_features
+from analysis_tool.openai_client import SharedClient, get_openai_client
+from analysis_tool.params import AUDIO_FILES_PATH
+from analysis_tool.text.transcript_index import TranscriptIndex
+
+# `openai` takes most of a second to import, it's only loaded once we actually call the API
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from openai.types.audio import TranscriptionVerbose
+
+CHUNK_FORMAT = "mp3"
+# Everything the transcript depends on besides the audio, also part of its cache key
+TRANSCRIPTION_PARAMS = {
+    "model": "whisper-1",
+    "language": "pl",
+    "timestamp_granularities": ["word", "segment"],
+}
+# Passive voice prompts hold whole segments up to this length, answers stay short enough
+# for `max_tokens` and latency depends on the longest prompt instead of the whole talk
+MAX_PROMPT_CHARS = 2000
+
+
+def generate_transcript_from_mp3(
+    file_name: str, decibels: np.ndarray | None = None
+) -> "TranscriptionVerbose":
+    """`decibels` of the audio chunks (see `read_volume_features`) are read from the file
+    when the caller doesn't have them already"""
+    file_path = os.path.join(AUDIO_FILES_PATH, file_name)
+    key = transcript_key(
+        file_path,
+        **TRANSCRIPTION_PARAMS,
+        **chunking_params(),
+        chunk_format=CHUNK_FORMAT,
+    )
+    cached = load_transcript(key)
+    if cached is not None:
+        return cached
 
+    if decibels is None:
+        with decode_to_wav(file_path) as wav:
+            decibels, _ = read_volume_features(wav)
 
-def get_openapi_key() -> str:
-    return load_envs().OPENAPI_KEY
+    print("HITTING OPENAI")
+    transcript = transcribe_audio(
+        file_path, split_at_silences(decibels), get_openai_client()
+    )
+    save_transcript(key, transcript)
+    return transcript
 
 
-def _add_to_cache(file_name: str, value: TranscriptionVerbose) -> None:
-    with open(os.path.join(TRANSCRIPT_CACHE_PATH, f"{file_name}.p"), "wb") as f:
-        pickle.dump(value, f)
+def transcribe_audio(
+    file_path: str, chunks: list[tuple[int, int]], client: SharedClient
+) -> "TranscriptionVerbose":
+    """Transcribe `chunks` (start, end in ms) of the audio concurrently and stitch them"""
+
+    def transcription_request(start: int, end: int):
+        async def request(api: "AsyncOpenAI") -> "TranscriptionVerbose":
+            # Encoding runs off the event loop, so other requests keep going meanwhile
+            chunk_data = await asyncio.to_thread(
+                encode_part, file_path, start, end, CHUNK_FORMAT
+            )
+            return await api.audio.transcriptions.create(
+                file=(f"chunk.{CHUNK_FORMAT}", chunk_data),
+                response_format="verbose_json",
+                **TRANSCRIPTION_PARAMS,
+            )
+
+        return request
+
+    transcripts = client.run_all(
+        "transcription",
+        [transcription_request(start, end) for start, end in chunks],
+    )
+    return merge_transcripts(
+        [
+            (start / 1e3, transcript)
+            for (start, _), transcript in zip(chunks, transcripts)
+        ]
+    )
 
 
-def _load_from_cache(file_name: str) -> TranscriptionVerbose | None:
-    path = os.path.join(TRANSCRIPT_CACHE_PATH, f"{file_name}.p")
+def chat_request(prompt: str, max_tokens: int = 500):
+    """Request for `SharedClient` answering a single user message"""
 
-    if not os.path.exists(path):
-        return None
+    async def request(api: "AsyncOpenAI") -> str:
+        response = await api.chat.completions.create(
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt,
+                }
+            ],
+            max_tokens=max_tokens,
+            model="gpt-3.5-turbo",
+        )
+        return response.choices[0].message.content.strip()
 
-    with open(path, "rb") as f:
-        return pickle.load(f)
+    return request
 
 
-def generate_transcript_from_mp3(file_name: str) -> TranscriptionVerbose:
-    cached = _load_from_cache(file_name)
-    if cached is not None:
-        return cached
+def prompt_gpt(prompt: str, max_tokens: int = 500) -> str:
+    return get_openai_client().run("chat", chat_request(prompt, max_tokens))
 
-    with open(os.path.join(AUDIO_FILES_PATH, file_name), "rb") as mp3_file:
-        client = OpenAI(api_key=get_openapi_key())
-
-        print("HITTING OPENAI")
-        transcript = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=mp3_file,
-            response_format="verbose_json",
-            timestamp_granularities=["word"],
-            language="pl",
-        )
-        _add_to_cache(file_name, transcript)
-    return transcript
 
+def recognize_passive_voice_words(
+    transcript: "TranscriptionVerbose",
+    index: TranscriptIndex | None = None,
+    client: SharedClient | None = None,
+) -> np.ndarray:
+    """Indices of passive voice words.
+
+    Whole segments are asked about in bounded prompts sent concurrently, words of every
+    answer are looked for only in the text of its own prompt.
+    """
+    if index is None:
+        index = TranscriptIndex.from_transcript(transcript)
+    client = client or get_openai_client()
+    chunks = _prompt_chunks(
+        index, _segment_first_words(transcript, index), MAX_PROMPT_CHARS
+    )
 
-def prompt_gpt(prompt: str, max_tokens: int = 500):
-    client = OpenAI(api_key=get_openapi_key())
-    response = client.chat.completions.create(
-        messages=[
-            {
-                "role": "user",
-                "content": prompt,
-            }
+    spans = [index.char_span(first, end) for first, end in chunks]
+    answers = client.run_all(
+        "passive_voice",
+        [
+            chat_request(_passive_voice_prompt(index.text[start:end]))
+            for start, end in spans
         ],
-        max_tokens=max_tokens,
-        model="gpt-3.5-turbo",
     )
-    return response.choices[0].message.content.strip()
 
+    word_indices = set()
+    for (start, end), answer in zip(spans, answers):
+        for word in _parse_word_list(answer):
+            pattern = rf"(?<!\w){re.escape(word)}(?!\w)"
+            for match in re.finditer(pattern, index.text[start:end], re.IGNORECASE):
+                word_indices.add(index.word_at(start + match.start()))
+    return np.array(sorted(word_indices), dtype=np.int64)
 
-def recognize_passive_voice_words(
-    transcript: TranscriptionVerbose,
-) -> list[TranscriptionWord]:
-    prompt = f"""Z tekstu zwróć wszystkie czasowniki w formie biernej w języku polskim w formacie 
+
+def _passive_voice_prompt(text: str) -> str:
+    return f"""Z tekstu zwróć wszystkie czasowniki w formie biernej w języku polskim w formacie 
     '```python["słowo_1", "słowo_2", ...]```'. 
-    Zwracaj tylko pojedyncze słowa, używając minimalnej liczby znaków: {transcript.text}"""
+    Zwracaj tylko pojedyncze słowa, używając minimalnej liczby znaków: {text}"""
+
+
+def _segment_first_words(
+    transcript: "TranscriptionVerbose", index: TranscriptIndex
+) -> np.ndarray:
+    """Index of the first word of every segment, every word without segments"""
+    if not transcript.segments:
+        return np.arange(len(index))
+
+    segment_starts = [segment.start for segment in transcript.segments]
+    return np.unique(np.searchsorted(index.start, segment_starts))
+
+
+def _prompt_chunks(
+    index: TranscriptIndex, boundaries: np.ndarray, max_chars: int
+) -> list[tuple[int, int]]:
+    """(first, end) word ranges of consecutive segments at most `max_chars` long"""
+    char_ends = index.char_offsets + np.array(
+        [len(word) for word in index.words], dtype=np.int64
+    )
 
-    passive_words = prompt_gpt(prompt)
-    list_string = passive_words.replace("python", "").replace("`", "").strip()
-    detected_words = set(ast.literal_eval(list_string))
-    return list(filter(lambda x: x.word in detected_words, transcript.words))
+    def fits(first: int, end: int) -> bool:
+        return char_ends[end - 1] - index.char_offsets[first] <= max_chars
+
+    chunks = []
+    first = last_fit = 0
+    for boundary in [*boundaries.tolist(), len(index)]:
+        if boundary <= first:
+            continue
+        if not fits(first, boundary) and last_fit > first:
+            chunks.append((first, last_fit))
+            first = last_fit
+
+        while first < boundary and not fits(first, boundary):
+            # A single segment too long for one prompt is cut between words
+            limit = index.char_offsets[first] + max_chars
+            end = max(int(np.searchsorted(char_ends, limit, side="right")), first + 1)
+            chunks.append((first, end))
+            first = end
+        last_fit = boundary
+
+    if first < len(index):
+        chunks.append((first, len(index)))
+    return chunks
+
+
+def _parse_word_list(answer: str) -> list[str]:
+    list_string = answer.replace("python", "").replace("`", "").strip()
+    try:
+        words = ast.literal_eval(list_string)
+    except (ValueError, SyntaxError):
+        words = None
+    # A string would be split into letters, a number isn't iterable
+    if not isinstance(words, (list, tuple)):
+        print(f"Unexpected answer: {answer}")
+        return []
+    return [str(word).strip() for word in words if str(word).strip()]
@@ -0,0 +1,138 @@
+import struct
+import subprocess
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+
+class WavReader:
+    """Reads a WAV stream, e.g. ffmpeg output from a pipe, in fixed-size blocks.
+
+    Sizes in the header are ignored, ffmpeg can't fill them in when writing to a pipe.
+    """
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        riff, _, wave = struct.unpack("<4sI4s", self._read_exactly(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError("Not a WAV stream")
+
+        while True:
+            chunk_id, size = struct.unpack("<4sI", self._read_exactly(8))
+            if chunk_id == b"data":
+                break
+
+            chunk = self._read_exactly(size + size % 2)
+            if chunk_id == b"fmt ":
+                _, self.channels, self.frame_rate, _, _, bits = struct.unpack(
+                    "<HHIIHH", chunk[:16]
+                )
+                if bits != 16:
+                    raise ValueError(f"Expected 16 bit samples, got {bits}")
+
+    def blocks(self, block_frames: int) -> Iterator[np.ndarray]:
+        """Mono samples, `block_frames` of them in every block but the last one"""
+        block_size = block_frames * self.channels * 2
+        while block := self.stream.read(block_size):
+            # Pipes return what is available, fill up the whole block
+            while len(block) < block_size and (
+                rest := self.stream.read(block_size - len(block))
+            ):
+                block += rest
+
+            samples = np.frombuffer(
+                block[: len(block) - len(block) % (self.channels * 2)], dtype="<i2"
+            )
+            yield self._to_mono(samples.reshape(-1, self.channels))
+
+    @staticmethod
+    def _to_mono(frames: np.ndarray) -> np.ndarray:
+        if frames.shape[1] == 1:
+            return frames[:, 0]
+        # Channels are averaged and rounded down, the same as pydub `set_channels(1)`
+        return np.floor(frames.mean(axis=1)).astype(np.int16)
+
+    def _read_exactly(self, size: int) -> bytes:
+        data = self.stream.read(size)
+        while len(data) < size and (rest := self.stream.read(size - len(data))):
+            data += rest
+        if len(data) < size:
+            raise ValueError("WAV header ended too early")
+        return data
+
+
+@contextmanager
+def decode_to_wav(file_path: str, encode_to: str | None = None) -> Iterator[WavReader]:
+    """Decode audio of any file with ffmpeg, streamed as 16 bit WAV through a pipe.
+
+    With `encode_to` the same decoded audio is also encoded into that file, its format
+    follows the extension.
+    """
+    process = subprocess.Popen(
+        [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-i",
+            file_path,
+            "-map",
+            "0:a:0",
+            "-map_metadata",
+            "-1",
+            "-acodec",
+            "pcm_s16le",
+            "-f",
+            "wav",
+            "pipe:1",
+            *(["-map", "0:a:0", "-y", encode_to] if encode_to else []),
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    try:
+        try:
+            reader = WavReader(process.stdout)
+        except ValueError:
+            # Nothing decoded, ffmpeg tells why
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed: {process.stderr.read().decode()}")
+            raise
+
+        yield reader
+        process.stdout.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed: {process.stderr.read().decode()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def encode_part(file_path: str, start_ms: int, end_ms: int, audio_format: str) -> bytes:
+    """Audio between `start_ms` and `end_ms` encoded by ffmpeg, the rest isn't decoded"""
+    return subprocess.run(
+        [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-ss",
+            str(start_ms / 1e3),
+            "-t",
+            str((end_ms - start_ms) / 1e3),
+            "-i",
+            file_path,
+            "-map",
+            "0:a:0",
+            "-map_metadata",
+            "-1",
+            "-f",
+            audio_format,
+            "pipe:1",
+        ],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        check=True,
+    ).stdout
@@ -0,0 +1,118 @@
+from dataclasses import dataclass, fields
+from typing import Iterator
+
+import numpy as np
+
+# Speech frequency band (300 Hz to 3000 Hz)
+SPEECH_BAND = (300, 3000)
+# Range of the fundamental frequency of human voice
+PITCH_RANGE = (60, 400)  # Hz
+# Normalized autocorrelation the pitch period needs to reach to treat a chunk as voiced
+VOICING_THRESHOLD = 0.5
+# Chunks transformed at once, bounds memory of the spectra of long recordings
+BLOCK_CHUNKS = 256
+
+
+@dataclass
+class SpectralFeatures:
+    """Per-chunk spectral features, every field is an array with one value per chunk"""
+
+    speech_band_energy: np.ndarray
+    out_of_band_energy: np.ndarray
+    flatness: np.ndarray  # 1 for white noise, close to 0 for tones
+    pitch: np.ndarray  # Hz, NaN where the chunk isn't voiced
+
+    @classmethod
+    def concatenate(cls, parts: list["SpectralFeatures"]) -> "SpectralFeatures":
+        return cls(
+            *(
+                np.concatenate([np.empty(0), *(getattr(p, f.name) for p in parts)])
+                for f in fields(cls)
+            )
+        )
+
+
+def frame_blocks(
+    samples: np.ndarray, chunk_samples: int, block_chunks: int = BLOCK_CHUNKS
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Blocks of consecutive chunks as matrices and the length of every chunk.
+
+    Full chunks are strided views of the samples, only the last, partial chunk is
+    copied and padded with zeros.
+    """
+    full_count = len(samples) // chunk_samples
+    full_chunks = samples[: full_count * chunk_samples].reshape(-1, chunk_samples)
+    for start in range(0, full_count, block_chunks):
+        block = full_chunks[start : start + block_chunks]
+        yield block, np.full(len(block), chunk_samples)
+
+    tail = samples[full_count * chunk_samples :]
+    if len(tail):
+        padded = np.zeros((1, chunk_samples), dtype=samples.dtype)
+        padded[0, : len(tail)] = tail
+        yield padded, np.array([len(tail)])
+
+
+def spectral_features(chunks: np.ndarray, sample_rate: int) -> SpectralFeatures:
+    """Features of every row of `chunks` from a single batched real FFT"""
+    chunk_samples = chunks.shape[1]
+    spectrum = np.fft.rfft(chunks, axis=1)
+    power = spectrum.real**2 + spectrum.imag**2
+
+    # Positive frequencies only, as in a complex FFT of the chunk
+    frequencies = np.fft.rfftfreq(chunk_samples, 1 / sample_rate)[: chunk_samples // 2]
+    magnitude = np.sqrt(power[:, : chunk_samples // 2])
+    speech_band = (frequencies >= SPEECH_BAND[0]) & (frequencies <= SPEECH_BAND[1])
+    speech_band_energy = magnitude[:, speech_band].sum(axis=1)
+    out_of_band_energy = magnitude.sum(axis=1) - speech_band_energy
+
+    # Geometric to arithmetic mean of the power spectrum
+    with np.errstate(divide="ignore"):
+        log_power = np.log(np.maximum(power, np.finfo(float).tiny))
+    mean_power = power.mean(axis=1)
+    flatness = np.divide(
+        np.exp(log_power.mean(axis=1)),
+        mean_power,
+        out=np.ones(len(chunks)),
+        where=mean_power > 0,
+    )
+
+    return SpectralFeatures(
+        speech_band_energy=speech_band_energy,
+        out_of_band_energy=out_of_band_energy,
+        flatness=flatness,
+        pitch=_estimate_pitch(power, chunk_samples, sample_rate),
+    )
+
+
+def _estimate_pitch(
+    power: np.ndarray, chunk_samples: int, sample_rate: int
+) -> np.ndarray:
+    """Pitch from the first autocorrelation peak in the range of human voice.
+
+    Autocorrelation is the inverse FFT of the power spectrum. It is circular, but pitch
+    periods are short compared to a chunk.
+    """
+    autocorrelation = np.fft.irfft(power, n=chunk_samples, axis=1)
+    energy = autocorrelation[:, :1]
+    autocorrelation = np.divide(
+        autocorrelation,
+        energy,
+        out=np.zeros_like(autocorrelation),
+        where=energy > 0,
+    )
+
+    shortest_period = int(sample_rate / PITCH_RANGE[1])
+    longest_period = int(np.ceil(sample_rate / PITCH_RANGE[0]))
+    candidates = autocorrelation[:, shortest_period : longest_period + 1]
+    peak = candidates.max(axis=1)
+
+    # Multiples of the period correlate as well, so the period is the top of the first
+    # lobe of lags close to the peak
+    close_to_peak = candidates >= 0.9 * peak[:, None]
+    lobe_started = np.cumsum(close_to_peak, axis=1) > 0
+    first_lobe = lobe_started & ~(np.cumsum(lobe_started & ~close_to_peak, axis=1) > 0)
+    period = shortest_period + np.argmax(
+        np.where(first_lobe, candidates, -np.inf), axis=1
+    )
+    return np.where(peak >= VOICING_THRESHOLD, sample_rate / period, np.nan)
@@ -0,0 +1,116 @@
+import json
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import Iterator
+
+import pytest
+
+from analysis_tool.openai_client import SharedClient
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def send_json(self, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class StandInTranscriptionHandler(StandInHandler):
+    """Answers every chunk with a single word half a second after its start, the first
+    request of every test is rate limited"""
+
+    rate_limited = False
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if not StandInTranscriptionHandler.rate_limited:
+            StandInTranscriptionHandler.rate_limited = True
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_json(
+            {
+                "text": "słowo",
+                "language": "polish",
+                "duration": "5.0",
+                "words": [{"word": "słowo", "start": 0.5, "end": 1.0}],
+                "segments": [
+                    {
+                        "id": 0,
+                        "seek": 0,
+                        "start": 0.5,
+                        "end": 1.0,
+                        "text": "słowo",
+                        "tokens": [1],
+                        "temperature": 0.0,
+                        "avg_logprob": -0.1,
+                        "compression_ratio": 1.0,
+                        "no_speech_prob": 0.0,
+                    }
+                ],
+            }
+        )
+
+
+class StandInChatHandler(StandInHandler):
+    """Finds passive voice only in prompts mentioning costs"""
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = request["messages"][0]["content"]
+        answer = '```python["podano"]```' if "koszty" in prompt else "```python[]```"
+
+        self.send_json(
+            {
+                "id": "chat",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-3.5-turbo",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": answer},
+                    }
+                ],
+            }
+        )
+
+
+@contextmanager
+def _stand_in_client(handler: type[StandInHandler]) -> Iterator[SharedClient]:
+    """Client of a local server answering with `handler`, both stopped on exit"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    client = SharedClient(
+        api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1"
+    )
+    try:
+        yield client
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def transcription_client() -> Iterator[SharedClient]:
+    StandInTranscriptionHandler.rate_limited = False
+    with _stand_in_client(StandInTranscriptionHandler) as client:
+        yield client
+
+
+@pytest.fixture
+def chat_client() -> Iterator[SharedClient]:
+    with _stand_in_client(StandInChatHandler) as client:
+        yield client
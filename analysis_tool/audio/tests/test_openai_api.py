@@ -0,0 +1,36 @@
+from hamcrest import assert_that, equal_to
+
+from analysis_tool.audio.openai_api import (
+    _parse_word_list,
+    recognize_passive_voice_words,
+)
+from analysis_tool.tests.transcripts import make_segment, make_transcript
+
+
+def test_gpt_answers_are_mapped_to_words_of_their_segment(chat_client, monkeypatch):
+    # given
+    monkeypatch.setattr("analysis_tool.audio.openai_api.MAX_PROMPT_CHARS", 20)
+    transcript = make_transcript(
+        "Podano wynik. Potem podano koszty.",
+        segments=[
+            make_segment(0, 0, 2, "Podano wynik."),
+            make_segment(1, 2, 5, "Potem podano koszty."),
+        ],
+    )
+
+    # when
+    word_indices = recognize_passive_voice_words(transcript, client=chat_client)
+
+    # then
+    assert_that(word_indices.tolist(), equal_to([3]))
+    assert_that(len(chat_client.metrics), equal_to(2))
+
+
+def test_answers_other_than_a_list_of_words_are_ignored():
+    assert_that(
+        _parse_word_list('```python["podano", "wskazano"]```'),
+        equal_to(["podano", "wskazano"]),
+    )
+    assert_that(_parse_word_list("```python'podano'```"), equal_to([]))
+    assert_that(_parse_word_list("```python42```"), equal_to([]))
+    assert_that(_parse_word_list("Nie ma strony biernej."), equal_to([]))
@@ -0,0 +1,51 @@
+import io
+import shutil
+import wave
+
+import numpy as np
+import pytest
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from analysis_tool.audio.pcm import WavReader, encode_part
+
+
+def test_wav_reader_returns_mono_blocks_of_fixed_size():
+    # given
+    stereo = np.random.default_rng(0).integers(-3000, 3000, (250, 2), dtype=np.int16)
+    stream = io.BytesIO()
+    with wave.open(stream, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(8000)
+        wav.writeframes(stereo.tobytes())
+    stream.seek(0)
+
+    # when
+    reader = WavReader(stream)
+    blocks = list(reader.blocks(100))
+
+    # then
+    assert reader.frame_rate == 8000
+    assert [len(block) for block in blocks] == [100, 100, 50]
+    assert np.array_equal(np.concatenate(blocks), stereo.sum(axis=1) // 2)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_encode_part_cuts_the_requested_interval(tmp_path):
+    # given
+    file_path = str(tmp_path / "tone.wav")
+    tone = Sine(440).to_audio_segment(duration=1000)
+    (tone + AudioSegment.silent(1000, frame_rate=tone.frame_rate)).export(
+        file_path, format="wav"
+    )
+
+    # when
+    part = WavReader(io.BytesIO(encode_part(file_path, 500, 1500, "wav")))
+
+    # then
+    samples = np.concatenate(list(part.blocks(part.frame_rate)))
+    assert len(samples) == part.frame_rate
+    # Half of the part is the tone, the rest is silence
+    half = part.frame_rate // 2
+    assert np.abs(samples[:half]).max() > 10_000 and not samples[half:].any()
@@ -0,0 +1,21 @@
+import numpy as np
+
+from analysis_tool.audio.spectral import spectral_features
+
+
+def test_spectral_features_of_voice_like_tone_and_noise():
+    # given
+    sample_rate = 16000
+    t = np.arange(4800) / sample_rate
+    tone = 3000 * np.sin(2 * np.pi * 150 * t) + 1000 * np.sin(2 * np.pi * 450 * t)
+    noise = np.random.default_rng(0).normal(0, 3000, len(t))
+    chunks = np.stack([tone, noise]).astype(np.int16)
+
+    # when
+    features = spectral_features(chunks, sample_rate)
+
+    # then
+    assert abs(features.pitch[0] - 150) < 2
+    assert np.isnan(features.pitch[1])
+    assert features.flatness[0] < 0.01 < 0.5 < features.flatness[1]
+    assert features.out_of_band_energy[1] > features.out_of_band_energy[0]
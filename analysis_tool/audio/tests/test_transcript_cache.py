@@ -0,0 +1,66 @@
+import os
+
+from hamcrest import assert_that, equal_to, is_not, none
+
+from analysis_tool.audio.transcript_cache import (
+    load_transcript,
+    save_transcript,
+    transcript_key,
+)
+from analysis_tool.tests.transcripts import make_transcript
+
+
+def test_transcript_key_depends_on_content_and_request(tmp_path):
+    # given
+    take = tmp_path / "take.mp3"
+    take.write_bytes(b"first take")
+    first_key = transcript_key(str(take), model="whisper-1", language="pl")
+
+    # when
+    take.write_bytes(b"second take")
+
+    # then
+    assert_that(
+        transcript_key(str(take), model="whisper-1", language="pl"),
+        is_not(equal_to(first_key)),
+    )
+    assert_that(
+        transcript_key(str(take), model="whisper-1", language="en"),
+        is_not(equal_to(transcript_key(str(take), model="whisper-1", language="pl"))),
+    )
+
+
+def test_cache_evicts_least_recently_used_transcripts(tmp_path):
+    # given
+    save_transcript("a", make_transcript("a"), cache_path=str(tmp_path))
+    entry_size = os.path.getsize(tmp_path / "a.json")
+    save_transcript("b", make_transcript("b"), cache_path=str(tmp_path))
+    os.utime(tmp_path / "a.json", (0, 0))
+    os.utime(tmp_path / "b.json", (1, 1))
+    load_transcript("a", cache_path=str(tmp_path))  # "a" is used again
+
+    # when
+    save_transcript(
+        "c", make_transcript("c"), cache_path=str(tmp_path), max_bytes=2 * entry_size
+    )
+
+    # then
+    assert_that(load_transcript("b", cache_path=str(tmp_path)), none())
+    assert_that(
+        load_transcript("a", cache_path=str(tmp_path)), equal_to(make_transcript("a"))
+    )
+    assert_that(sorted(os.listdir(tmp_path)), equal_to(["a.json", "c.json"]))
+
+
+def test_corrupt_entry_is_a_cache_miss(tmp_path):
+    # given
+    save_transcript("a", make_transcript("a"), cache_path=str(tmp_path))
+    entry = tmp_path / "a.json"
+    entry.write_bytes(entry.read_bytes()[:10])
+
+    # when
+    transcript = load_transcript("a", cache_path=str(tmp_path))
+
+    # then
+    assert_that(transcript, none())
+    assert_that(entry.exists(), equal_to(False))
@@ -0,0 +1,86 @@
+import shutil
+
+import numpy as np
+import pytest
+from hamcrest import assert_that, contains_exactly, equal_to, has_properties
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from analysis_tool.audio.openai_api import transcribe_audio
+from analysis_tool.audio.pcm import WavReader
+from analysis_tool.audio.transcription import chunking_params, split_at_silences
+from analysis_tool.audio.volume_analyzer import read_volume_features
+
+
+def _speech_with_pauses() -> AudioSegment:
+    """3 s of tone, 2.1 s of silence, repeated three times"""
+    tone = Sine(440).to_audio_segment(duration=3000, volume=-10)
+    pause = AudioSegment.silent(duration=2100, frame_rate=tone.frame_rate)
+    return tone + pause + tone + pause + tone
+
+
+def _decibels(audio: AudioSegment) -> np.ndarray:
+    decibels, _ = read_volume_features(WavReader(audio.export(format="wav")))
+    return decibels
+
+
+def test_split_at_silences_cuts_in_the_middle_of_pauses():
+    # when
+    chunks = split_at_silences(_decibels(_speech_with_pauses()), max_chunk_ms=6000)
+
+    # then
+    assert_that(chunks, equal_to([(0, 4050), (4050, 9150), (9150, 13200)]))
+
+
+def test_chunking_params_follow_the_settings(monkeypatch):
+    # given
+    default = chunking_params()
+
+    # when
+    monkeypatch.setattr("analysis_tool.audio.transcription.MAX_CHUNK_MS", 60_000)
+
+    # then
+    assert_that(chunking_params(), equal_to({**default, "max_chunk_ms": 60_000}))
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_chunk_transcripts_are_stitched_with_offsets(transcription_client, tmp_path):
+    # given
+    file_path = str(tmp_path / "speech.mp3")
+    _speech_with_pauses().export(file_path, format="mp3")
+    chunks = [(0, 4000), (4000, 9000), (9000, 13000)]
+
+    # when
+    transcript = transcribe_audio(file_path, chunks, transcription_client)
+
+    # then
+    assert_that(transcript.text, equal_to("słowo słowo słowo"))
+    assert_that(transcript.duration, equal_to("14.0"))
+    assert_that(
+        transcript.words,
+        contains_exactly(
+            has_properties(start=0.5, end=1.0),
+            has_properties(start=4.5, end=5.0),
+            has_properties(start=9.5, end=10.0),
+        ),
+    )
+    assert_that([segment.id for segment in transcript.segments], equal_to([0, 1, 2]))
+    # The rate limited chunk was retried
+    assert_that(
+        sorted(metrics.attempts for metrics in transcription_client.metrics),
+        equal_to([1, 1, 2]),
+    )
+
+
+def test_empty_audio_is_not_sent_to_the_api(transcription_client):
+    # given
+    chunks = split_at_silences(np.array([]))
+
+    # when
+    transcript = transcribe_audio("empty.mp3", chunks, transcription_client)
+
+    # then
+    assert_that(chunks, equal_to([]))
+    assert_that(transcript.text, equal_to(""))
+    assert_that(transcript.words, equal_to([]))
+    assert_that(len(transcription_client.metrics), equal_to(0))
@@ -0,0 +1,65 @@
+import numpy as np
+from pydub import AudioSegment
+
+from analysis_tool.audio.spectral import frame_blocks
+from analysis_tool.audio.volume_analyzer import (
+    AudioVolumeAnalyzer,
+    FragmentSegmenter,
+    chunk_decibels,
+    to_decibels,
+)
+
+
+def _segment(matches: str) -> list[tuple[float, float]]:
+    segmenter = FragmentSegmenter(chunk_length_ms=1000)
+    fragments = []
+    for match in matches:
+        fragments.extend(segmenter.push(match == "x"))
+    return [*fragments, *segmenter.finish()]
+
+
+def test_fragment_segmenter_tolerates_short_gaps():
+    assert _segment("..xxx.xx...x....") == [(2, 10)]
+
+
+def test_fragment_segmenter_skips_too_short_fragments():
+    assert _segment("xx.......xxxx...") == [(9, 16)]
+
+
+def test_fragment_segmenter_joins_touching_fragments():
+    assert _segment("xxxx...xxxx...") == [(0, 14)]
+
+
+def test_fragment_segmenter_closes_fragment_still_open_at_the_end():
+    assert _segment("....xx") == [(4, 6)]
+
+
+def test_chunk_decibels_match_pydub_rms_of_every_chunk():
+    # given
+    samples = np.random.default_rng(0).integers(-3000, 3000, 1000, dtype=np.int16)
+    audio = AudioSegment(samples.tobytes(), sample_width=2, frame_rate=1000, channels=1)
+
+    # when
+    decibels = np.concatenate(
+        [chunk_decibels(*block) for block in frame_blocks(samples, 300, 2)]
+    )
+
+    # then
+    expected = [to_decibels(audio[i : i + 300].rms) for i in range(0, 1000, 300)]
+    assert np.allclose(decibels, expected, atol=0.01)
+
+
+def test_flat_intonation_is_monotone_and_varied_is_not():
+    # given
+    rng = np.random.default_rng(0)
+    flat = 120 * 2 ** (rng.normal(0, 0.3, 40) / 12)
+    varied = 120 * 2 ** (rng.normal(0, 4, 40) / 12)
+    pitch = np.concatenate([flat, varied])
+    pitch[::5] = np.nan  # Unvoiced chunks
+
+    # when
+    monotone = AudioVolumeAnalyzer._is_monotone(pitch)
+
+    # then
+    assert monotone[8:32].all()
+    assert not monotone[48:].any()
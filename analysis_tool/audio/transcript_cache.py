@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING
+
+from analysis_tool.cache import evict_least_recently_used, touch, write_atomically
+from analysis_tool.params import CACHE_PATH
+
+if TYPE_CHECKING:
+    from openai.types.audio import TranscriptionVerbose
+
+TRANSCRIPT_CACHE_PATH = os.path.join(CACHE_PATH, "transcripts")
+# Least recently used transcripts are removed above this size of the cache
+TRANSCRIPT_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+
+def transcript_key(file_path: str, **request_params) -> str:
+    """Hash of the audio content and of everything in the request changing the transcript"""
+    with open(file_path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256")
+    digest.update(json.dumps(request_params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _entry_path(key: str, cache_path: str) -> str:
+    return os.path.join(cache_path, f"{key}.json")
+
+
+def load_transcript(
+    key: str, cache_path: str = TRANSCRIPT_CACHE_PATH
+) -> "TranscriptionVerbose | None":
+    from openai.types.audio import TranscriptionVerbose
+    from pydantic import ValidationError
+
+    path = _entry_path(key, cache_path)
+    try:
+        with open(path, "rb") as f:
+            transcript = TranscriptionVerbose.model_validate_json(f.read())
+    except FileNotFoundError:
+        return None
+    except ValidationError:
+        # Truncated or corrupt entry, the transcript is fetched again
+        os.remove(path)
+        return None
+
+    touch(path)
+    return transcript
+
+
+def save_transcript(
+    key: str,
+    transcript: "TranscriptionVerbose",
+    cache_path: str = TRANSCRIPT_CACHE_PATH,
+    max_bytes: int = TRANSCRIPT_CACHE_MAX_BYTES,
+) -> None:
+    os.makedirs(cache_path, exist_ok=True)
+
+    write_atomically(
+        _entry_path(key, cache_path), transcript.model_dump_json(exclude_none=True)
+    )
+    evict_least_recently_used(cache_path, max_bytes, ".json")
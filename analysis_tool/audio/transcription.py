@@ -0,0 +1,134 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from analysis_tool.audio.volume_analyzer import CHUNK_LENGTH_MS
+
+if TYPE_CHECKING:
+    from openai.types.audio import TranscriptionVerbose
+
+# Chunks stay well below the 25 MB upload limit of the API also as mp3
+MAX_CHUNK_MS = 10 * 60 * 1000
+# Pause long enough to cut the audio there without cutting a word
+MIN_SILENCE_MS = 500
+# Silence is this much quieter than the average loudness of the recording
+SILENCE_BELOW_AVERAGE_DB = 16
+
+
+def chunking_params() -> dict:
+    """Everything deciding where the audio is cut, words next to cuts depend on it"""
+    return {
+        "max_chunk_ms": MAX_CHUNK_MS,
+        "min_silence_ms": MIN_SILENCE_MS,
+        "silence_below_average_db": SILENCE_BELOW_AVERAGE_DB,
+        "loudness_chunk_ms": CHUNK_LENGTH_MS,
+    }
+
+
+def _speech_runs(decibels: np.ndarray, chunk_length_ms: int) -> list[tuple[int, int]]:
+    """(start, end) chunk indices of speech, shorter pauses than `MIN_SILENCE_MS` included"""
+    if not len(decibels):
+        return []
+
+    # Loudness of the whole recording, the same as of all its samples together
+    with np.errstate(divide="ignore"):
+        average = 10 * np.log10(np.mean(10 ** (decibels / 10)))
+    silent = np.concatenate(
+        [[False], decibels < average - SILENCE_BELOW_AVERAGE_DB, [False]]
+    )
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    min_silence_chunks = -(-MIN_SILENCE_MS // chunk_length_ms)
+
+    speech = []
+    position = 0
+    for start, end in zip(edges[::2], edges[1::2]):
+        if end - start < min_silence_chunks:
+            continue
+        if start > position:
+            speech.append((position, int(start)))
+        position = int(end)
+    if position < len(decibels):
+        speech.append((position, len(decibels)))
+    return speech
+
+
+def split_at_silences(
+    decibels: np.ndarray,
+    max_chunk_ms: int = MAX_CHUNK_MS,
+    chunk_length_ms: int = CHUNK_LENGTH_MS,
+) -> list[tuple[int, int]]:
+    """(start, end) in ms of consecutive chunks not longer than `max_chunk_ms`.
+
+    `decibels` is the loudness of every `chunk_length_ms` of the recording, as read by
+    `read_volume_features`, so the audio itself is never held in memory. Chunks are cut
+    in the middle of the last pause that fits, speech without any pause that long is
+    cut hard.
+    """
+    speech = [
+        (start * chunk_length_ms, end * chunk_length_ms)
+        for start, end in _speech_runs(decibels, chunk_length_ms)
+    ]
+    duration = len(decibels) * chunk_length_ms
+
+    cuts = [0]
+    previous_end = None
+    for start, end in [*speech, (duration, duration)]:
+        if end - cuts[-1] > max_chunk_ms and previous_end and previous_end > cuts[-1]:
+            cuts.append((previous_end + start) // 2)
+
+        while end - cuts[-1] > max_chunk_ms:
+            cuts.append(cuts[-1] + max_chunk_ms)
+        previous_end = end
+
+    if cuts[-1] < duration:
+        cuts.append(duration)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def merge_transcripts(
+    parts: list[tuple[float, "TranscriptionVerbose"]],
+) -> "TranscriptionVerbose":
+    """Join transcripts of consecutive chunks, each starting at its offset in seconds"""
+    if not parts:
+        # Empty audio has no chunks
+        from openai.types.audio import TranscriptionVerbose
+
+        # The API names the language in full
+        return TranscriptionVerbose(
+            duration="0", language="polish", text="", words=[], segments=[]
+        )
+
+    words = []
+    segments = []
+    for offset, part in parts:
+        words.extend(
+            word.model_copy(
+                update={"start": word.start + offset, "end": word.end + offset}
+            )
+            for word in part.words or []
+        )
+        first_id = len(segments)
+        segments.extend(
+            segment.model_copy(
+                update={
+                    "id": first_id + i,
+                    "start": segment.start + offset,
+                    "end": segment.end + offset,
+                    # Seek is counted in 10 ms frames
+                    "seek": segment.seek + round(offset * 100),
+                }
+            )
+            for i, segment in enumerate(part.segments or [])
+        )
+
+    last_offset, last_part = parts[-1]
+    return parts[0][1].model_copy(
+        update={
+            "text": " ".join(
+                part.text.strip() for _, part in parts if part.text.strip()
+            ),
+            "duration": str(last_offset + float(last_part.duration)),
+            "words": words,
+            "segments": segments,
+        }
+    )
@@ -1,145 +1,226 @@
 import os
+from functools import cached_property
 
 import numpy as np
-from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
-from scipy.fftpack import fft
 
+from analysis_tool.audio.pcm import WavReader, decode_to_wav
+from analysis_tool.audio.spectral import (
+    BLOCK_CHUNKS,
+    SpectralFeatures,
+    frame_blocks,
+    spectral_features,
+)
 from analysis_tool.params import AUDIO_FILES_PATH
 
+CHUNK_LENGTH_MS = 300
+
 
 def to_decibels(rms):
     return 20 * np.log10(rms)
 
 
-class AudioVolumeAnalyzer:
-    def __init__(self, file_name: str) -> None:
-        self.file_name = file_name
+class FragmentSegmenter:
+    """Joins consecutive matching audio chunks into (start, end) fragments.
 
-    def get_too_loud_fragments(self) -> list[tuple[float, float]]:
-        return self._get_volume_problems(self._is_too_loud)
-    
-    def get_too_quiet_fragments(self) -> list[tuple[float, float]]:
-        return self._get_volume_problems(self._is_too_low)
-    
-    def get_high_noise_fragments(self) -> list[tuple[float, float]]:
-        return self._get_volume_problems(self._is_ambient_noise_too_loud_for_audio_chunk)
+    Chunks are pushed one by one and fragments are returned as soon as they are closed,
+    so the same state machine serves whole files and live streams.
+    """
 
-    def _get_volume_problems(self, callback: callable) -> list[tuple[float, float]]:
-        # Load the audio file
-        audio = AudioSegment.from_file(os.path.join(AUDIO_FILES_PATH, self.file_name))
+    LEAST_CHUNKS_TO_COUNT = 4
+    EXCEPTIONS_COUNT_TO_STOP_COUNTING = 3
 
-        # Convert to mono (if stereo) and get raw data
-        audio = audio.set_channels(1)
-        # Split the audio into chunks (e.g., 100ms windows)
-        chunk_length_ms = 300
-        chunks = [audio[i:i+chunk_length_ms] for i in range(0, len(audio), chunk_length_ms)]
+    def __init__(self, chunk_length_ms: int = CHUNK_LENGTH_MS) -> None:
+        self.chunk_length_ms = chunk_length_ms
+        self.chunk_index = 0
+        # Fragment boundaries are kept as chunk indices
+        self.start = None
+        self.record_counter = 0
+        self.exceptions_count = 0
+        # Closed fragment which still can be joined with a directly following one
+        self.pending_fragment = None
 
-        # Detect loud fragments by computing the RMS
-        searched_fragments = []
-        least_chunks_to_count = 4
-        exceptions_count_to_stop_counting = 3
-        ambient_noise = min([to_decibels(ch.rms) for ch in chunks if to_decibels(ch.rms) != -np.inf])
-
-        start_time = None
-        record_counter = 0
-        exceptions_count = 0
-        for i, chunk in enumerate(chunks):
-            # db = to_decibels(chunk.rms)
-            # ts = i * chunk_length_ms / 1e3
-
-            # print(f"{db, ts, ambient_noise = }")
-            ts = i * chunk_length_ms / 1e3
-            matches = callback(chunk, ambient_noise, ts=ts)
-            # print(f"{start_time, matches, record_counter, ts = }")
-
-            if matches and start_time:
-                record_counter += 1
-
-            if matches and not start_time:
-                start_time = i * chunk_length_ms / 1e3
-                record_counter = 1
-                exceptions_count = 0
-            
-            if not matches and start_time:
-                exceptions_count += 1
-
-                if exceptions_count >= exceptions_count_to_stop_counting:
-                    if record_counter >= least_chunks_to_count:
-                        searched_fragments.append((start_time, (i+1) * chunk_length_ms / 1e3))
-
-                    record_counter = 0  
-                    start_time = None
-                    exceptions_count = 0
-                    continue
-        
-        if start_time:
-            searched_fragments.append((start_time, (i+1) * chunk_length_ms / 1e3))
+    def push(self, matches: bool) -> list[tuple[float, float]]:
+        i = self.chunk_index
+        self.chunk_index += 1
+        closed = []
+
+        if matches and self.start is not None:
+            self.record_counter += 1
+
+        if matches and self.start is None:
+            self.start = i
+            self.record_counter = 1
+            self.exceptions_count = 0
+
+        if not matches and self.start is not None:
+            self.exceptions_count += 1
 
+            if self.exceptions_count >= self.EXCEPTIONS_COUNT_TO_STOP_COUNTING:
+                if self.record_counter >= self.LEAST_CHUNKS_TO_COUNT:
+                    closed = self._close((self.start, i + 1))
+
+                self.record_counter = 0
+                self.start = None
+                self.exceptions_count = 0
+
+        # Chunk right after the pending fragment didn't start a new one, it can't grow
+        if (
+            self.pending_fragment
+            and self.pending_fragment[1] < self.chunk_index
+            and self.start != self.pending_fragment[1]
+        ):
+            closed.append(self._to_seconds(self.pending_fragment))
+            self.pending_fragment = None
+
+        return closed
+
+    def finish(self) -> list[tuple[float, float]]:
+        closed = []
+        if self.start is not None:
+            closed = self._close((self.start, self.chunk_index))
+            self.start = None
+
+        if self.pending_fragment:
+            closed.append(self._to_seconds(self.pending_fragment))
+            self.pending_fragment = None
+
+        return closed
+
+    def _close(self, fragment: tuple[int, int]) -> list[tuple[float, float]]:
         # Join overlapping timestamps
-        new_fragments = []
-        _start, _end = None, None
-        for start_ts, end_ts in searched_fragments:
-            if _start is None:
-                _start, _end = start_ts, end_ts
-                continue
-            
-            if _end == start_ts:
-                _end = end_ts
-            else:
-                new_fragments.append((_start, _end))
-                _start, _end = None, None
-        
-        if _start:
-            new_fragments.append((_start, _end))
-
-
-        return new_fragments
+        if self.pending_fragment and self.pending_fragment[1] == fragment[0]:
+            self.pending_fragment = (self.pending_fragment[0], fragment[1])
+            return []
 
-    @staticmethod
-    def _is_ambient_noise_too_loud_for_audio_chunk(audio: np.array, *args, **kwargs) -> bool:
-        raw_data = np.array(audio.get_array_of_samples())
-        sample_rate = audio.frame_rate
+        closed = (
+            [self._to_seconds(self.pending_fragment)] if self.pending_fragment else []
+        )
+        self.pending_fragment = fragment
+        return closed
 
-        # Perform Fast Fourier Transform (FFT)
-        n = len(raw_data)
-        fft_data = fft(raw_data)
+    def _to_seconds(self, fragment: tuple[int, int]) -> tuple[float, float]:
+        start, end = fragment
+        return start * self.chunk_length_ms / 1e3, end * self.chunk_length_ms / 1e3
 
-        # Get the frequency spectrum (positive frequencies only)
-        frequencies = np.fft.fftfreq(n, 1/sample_rate)
-        positive_frequencies = frequencies[:n//2]
-        magnitude = np.abs(fft_data[:n//2])
 
-        # Speech frequency band (300 Hz to 3000 Hz)
-        speech_band_low = 300
-        speech_band_high = 3000
+def chunk_decibels(chunks: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Loudness of every chunk, the same as `to_decibels` of pydub rms"""
+    # Squares are summed as floats, so 16 and 32 bit samples don't overflow
+    squares = np.einsum("ij,ij->i", chunks, chunks, dtype=np.float64, casting="unsafe")
+    with np.errstate(divide="ignore"):
+        return to_decibels(np.sqrt(squares / lengths))
 
-        # Calculate total energy (sum of magnitudes)
-        total_energy = np.sum(magnitude)
 
-        # Energy in the speech band
-        speech_band_energy = np.sum(magnitude[(positive_frequencies >= speech_band_low) & (positive_frequencies <= speech_band_high)])
+# Loudness (dB) and spectral features of every chunk
+VolumeFeatures = tuple[np.ndarray, SpectralFeatures]
 
-        # Energy outside the speech band (ambient noise energy)
-        ambient_noise_energy = total_energy - speech_band_energy
 
-        # This threshold was set empirically xD
-        return ambient_noise_energy >= 60_000_000
+def read_volume_features(wav: WavReader) -> VolumeFeatures:
+    """Features of every chunk of the stream.
 
-        # print(f"{total_energy:_}, {ambient_noise_energy:_}, {kwargs = }")
+    Audio is read in blocks of chunks and only the small per-chunk features are kept,
+    so memory doesn't grow with the length of the recording.
+    """
+    decibels, spectral = [], []
+    chunk_samples = wav.frame_rate * CHUNK_LENGTH_MS // 1000
+    for block in wav.blocks(chunk_samples * BLOCK_CHUNKS):
+        for chunks, lengths in frame_blocks(block, chunk_samples):
+            decibels.append(chunk_decibels(chunks, lengths))
+            spectral.append(spectral_features(chunks, wav.frame_rate))
 
-        # # Percentage of energy in the ambient noise
-        # ambient_noise_ratio = (ambient_noise_energy / total_energy) * 100
-        # return ambient_noise_ratio > 50
-    
-    @staticmethod
-    def _is_too_loud(audio: np.array, *args, **kwargs) -> bool:
-        db = to_decibels(audio.rms)
-        too_loud_speech_thresh = 55  # db
-        return db > too_loud_speech_thresh
+    return (
+        np.concatenate([np.empty(0), *decibels]),
+        SpectralFeatures.concatenate(spectral),
+    )
+
+
+class AudioVolumeAnalyzer:
+    LOUD_SPEECH_THRESHOLD = 55  # db
+    QUIET_SPEECH_THRESHOLD = 40  # db
+    # This threshold was set empirically xD
+    NOISE_ENERGY_THRESHOLD = 60_000_000
+    # Pitch of speech without accentuation stays within this spread (standard deviation)
+    MONOTONE_PITCH_SEMITONES = 1.0
+    MONOTONE_WINDOW_CHUNKS = 17  # ~5 s
+    # Pitch spread is only judged in windows where the speaker mostly speaks
+    MIN_VOICED_FRACTION = 0.5
+
+    def __init__(self, file_name: str, features: VolumeFeatures | None = None) -> None:
+        self.file_name = file_name
+        # Features are read from the file only when they weren't extracted elsewhere
+        self.given_features = features
+
+    @cached_property
+    def _features(self) -> VolumeFeatures:
+        if self.given_features is not None:
+            return self.given_features
+
+        with decode_to_wav(os.path.join(AUDIO_FILES_PATH, self.file_name)) as wav:
+            return read_volume_features(wav)
+
+    @property
+    def ambient_noise(self) -> float:
+        decibels, _ = self._features
+        return np.min(decibels[decibels != -np.inf], initial=np.inf)
+
+    def get_too_loud_fragments(self) -> list[tuple[float, float]]:
+        decibels, _ = self._features
+        return self._get_volume_problems(self._is_too_loud(decibels))
+
+    def get_too_quiet_fragments(self) -> list[tuple[float, float]]:
+        decibels, _ = self._features
+        return self._get_volume_problems(self._is_too_low(decibels, self.ambient_noise))
+
+    def get_high_noise_fragments(self) -> list[tuple[float, float]]:
+        _, spectral = self._features
+        return self._get_volume_problems(self._is_ambient_noise_too_loud(spectral))
+
+    def get_monotone_fragments(self) -> list[tuple[float, float]]:
+        _, spectral = self._features
+        return self._get_volume_problems(self._is_monotone(spectral.pitch))
 
     @staticmethod
-    def _is_too_low(audio: np.array, ambient_noise: np.float32, *args, **kwargs) -> bool:
-        db = to_decibels(audio.rms)
-        too_quiet_speech_thresh = 40  # db
-        return db > too_quiet_speech_thresh or db - ambient_noise < 10
\ No newline at end of file
+    def _get_volume_problems(matches: np.ndarray) -> list[tuple[float, float]]:
+        segmenter = FragmentSegmenter()
+        searched_fragments = []
+        for chunk_matches in matches.tolist():
+            searched_fragments.extend(segmenter.push(chunk_matches))
+
+        searched_fragments.extend(segmenter.finish())
+        return searched_fragments
+
+    @classmethod
+    def _is_ambient_noise_too_loud(cls, spectral: SpectralFeatures) -> np.ndarray:
+        # Energy outside the speech band (ambient noise energy)
+        return spectral.out_of_band_energy >= cls.NOISE_ENERGY_THRESHOLD
+
+    @classmethod
+    def _is_too_loud(cls, decibels: np.ndarray) -> np.ndarray:
+        return decibels > cls.LOUD_SPEECH_THRESHOLD
+
+    @classmethod
+    def _is_too_low(cls, decibels: np.ndarray, ambient_noise: float) -> np.ndarray:
+        return (decibels > cls.QUIET_SPEECH_THRESHOLD) | (decibels - ambient_noise < 10)
+
+    @classmethod
+    def _is_monotone(cls, pitch: np.ndarray) -> np.ndarray:
+        """Chunks in the middle of a window of speech with flat intonation"""
+        voiced = ~np.isnan(pitch)
+        if not voiced.any():
+            return np.zeros(len(pitch), dtype=bool)
+
+        semitones = 12 * np.log2(np.where(voiced, pitch, 1) / np.median(pitch[voiced]))
+        semitones[~voiced] = 0
+
+        # Window sums centered on every chunk
+        half = cls.MONOTONE_WINDOW_CHUNKS // 2
+        kernel = np.ones(cls.MONOTONE_WINDOW_CHUNKS)
+        count = np.convolve(voiced, kernel)[half : half + len(pitch)]
+        total = np.convolve(semitones, kernel)[half : half + len(pitch)]
+        squares = np.convolve(semitones**2, kernel)[half : half + len(pitch)]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spread = np.sqrt(np.maximum(squares / count - (total / count) ** 2, 0))
+        return (count >= cls.MIN_VOICED_FRACTION * cls.MONOTONE_WINDOW_CHUNKS) & (
+            spread < cls.MONOTONE_PITCH_SEMITONES
+        )
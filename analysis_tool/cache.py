@@ -0,0 +1,41 @@
+import os
+
+
+def write_atomically(path: str, data: str) -> None:
+    """Write to a temporary file first, so readers never see a half written file and
+    processes writing the same path at once just replace each other's complete file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def touch(path: str) -> None:
+    """Mark the entry as just used, eviction goes by modification time"""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass  # Just evicted by another process, the entry was read already
+
+
+def evict_least_recently_used(cache_path: str, max_bytes: int, suffix: str) -> None:
+    """Remove least recently used `suffix` files until the rest fits into `max_bytes`"""
+    entries = []
+    for entry in os.scandir(cache_path):
+        if not entry.name.endswith(suffix):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Another process evicted it first
+        total -= size
@@ -1,21 +1,54 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
 from analysis_tool.audio.audio_parser import AudioParser
 from analysis_tool.audio.mistakes import get_audio_mistakes
+from analysis_tool.audio.pcm import decode_to_wav
+from analysis_tool.audio.volume_analyzer import (
+    AudioVolumeAnalyzer,
+    read_volume_features,
+)
 from analysis_tool.mistakes.models import Mistake
+from analysis_tool.params import AUDIO_FILES_PATH
 from analysis_tool.text.mistakes import get_text_mistakes, compare_transcription
-from analysis_tool.video.mistakes import get_video_mistakes
-from analysis_tool.video.video_parser import VideoParser
+
+if TYPE_CHECKING:
+    from analysis_tool.video.video_parser import VideoParser
 
 
 def extract_mistakes_from_video(file_name: str) -> list[Mistake]:
+    # Video stack pulls in OpenCV and the models, keep it out of text and audio only imports
+    from analysis_tool.video.mistakes import get_video_mistakes
+    from analysis_tool.video.video_parser import VideoParser
+
     video = VideoParser(file_name)
-    audio_name = video.save_mp3()
-    audio = AudioParser(audio_name)
+
+    # Audio is extracted, analyzed and transcribed while the video is being analyzed
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        audio_future = executor.submit(_extract_audio, video)
+        video_mistakes = get_video_mistakes(video)
+        # Re-raises errors of the audio pipeline
+        audio, volume_analyzer = audio_future.result()
 
     text_mistakes = get_text_mistakes(audio.transcript)
-    audio_mistakes = get_audio_mistakes(audio)
-    video_mistakes = get_video_mistakes(video)
+    audio_mistakes = get_audio_mistakes(audio, volume_analyzer)
     transcription_mistakes = compare_transcription(
-        transcription=audio.transcript.text, subtitles=video.ocr_subtitles
+        transcription=audio.transcript, subtitles=video.ocr_subtitle_cues
     )
 
     return [*text_mistakes, *audio_mistakes, *video_mistakes, *transcription_mistakes]
+
+
+def _extract_audio(video: "VideoParser") -> tuple[AudioParser, AudioVolumeAnalyzer]:
+    """Decode the audio of the video once. PCM goes straight to volume analysis, the mp3
+    is encoded along only for the transcription upload."""
+    mp3_path = os.path.join(AUDIO_FILES_PATH, video.audio_file_name)
+    os.makedirs(AUDIO_FILES_PATH, exist_ok=True)
+
+    with decode_to_wav(video.file_path, encode_to=mp3_path) as wav:
+        volume_features = read_volume_features(wav)
+
+    volume_analyzer = AudioVolumeAnalyzer(video.audio_file_name, volume_features)
+    decibels, _ = volume_features
+    return AudioParser(video.audio_file_name, decibels), volume_analyzer
@@ -13,13 +13,14 @@ class MistakeType(StrEnum):
     INTERLUDES = "interludes"
 
     # 140 -160 words per minute is good tempo, i would set too_slow <= 135, too_fast >= 165
-    SPEAKING_TOO_FAST = "speaking too fast"  # TODO: na potem moze ogarnac jak to zrobic na pojedynczych zdaniach
+    # Measured in sliding windows, so the passages spoken too fast are pointed out
+    SPEAKING_TOO_FAST = "speaking too fast"
 
     # Just detecting repetition in words ???
     REPETITIONS = "repetitions"
     CHANGING_TOPIC = "changing the topic of speech"
 
-    # Numbers per minute ? Per sentence ? Should be calculated dynamically for frames
+    # Numbers per minute in sliding windows
     TOO_MANY_NUMBERS = "too many numbers"
     LONG_DIFFICULT_WORDS = "too long, difficult words, sentences"
     JARGON = "jargon"
@@ -0,0 +1,203 @@
+import os
+import queue
+import subprocess
+import tempfile
+from threading import Event, Thread
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+from analysis_tool.audio.mistakes import VolumeMistakesStream
+from analysis_tool.audio.volume_analyzer import CHUNK_LENGTH_MS
+from analysis_tool.mistakes.models import Mistake
+
+STREAM_FRAME_SIZE = (1280, 720)  # width, height
+AUDIO_SAMPLE_RATE = 16000
+# Decoded frames and audio chunks waiting for analysis, bounds memory when analysis lags
+BUFFER_SIZE = 32
+# How often readers waiting for a full buffer check if the analysis was stopped
+PUT_TIMEOUT = 0.1  # seconds
+
+
+def _put(buffer: queue.Queue, item: tuple, stopped: Event) -> None:
+    """Wait for room in the buffer, unless nobody is going to take from it anymore"""
+    while not stopped.is_set():
+        try:
+            buffer.put(item, timeout=PUT_TIMEOUT)
+            return
+        except queue.Full:
+            pass
+
+
+def _read_blocks(
+    pipe: BinaryIO,
+    kind: str,
+    block_size: int,
+    interval: float,
+    buffer: queue.Queue,
+    stopped: Event,
+) -> None:
+    try:
+        block_index = 0
+        while not stopped.is_set() and (block := pipe.read(block_size)):
+            if len(block) < block_size:
+                break
+            _put(buffer, (kind, block_index * interval, block), stopped)
+            block_index += 1
+    finally:
+        pipe.close()
+        _put(buffer, (kind, None, None), stopped)  # End of the stream
+
+
+def _start_ffmpeg(
+    source: str, follow: bool, fps: float, stderr: BinaryIO
+) -> tuple[subprocess.Popen, int]:
+    width, height = STREAM_FRAME_SIZE
+    audio_read, audio_write = os.pipe()
+    command = [
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        # Keep reading a file that is still being written
+        *(["-follow", "1"] if follow else []),
+        "-i",
+        source,
+        "-map",
+        "0:v:0",
+        "-vf",
+        f"fps={fps},scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "bgr24",
+        "pipe:1",
+        "-map",
+        "0:a:0",
+        "-ac",
+        "1",
+        "-ar",
+        str(AUDIO_SAMPLE_RATE),
+        "-f",
+        "s16le",
+        f"pipe:{audio_write}",
+    ]
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        # A file never fills up and blocks ffmpeg like an unread pipe would
+        stderr=stderr,
+        pass_fds=(audio_write,),
+    )
+    os.close(audio_write)
+    return process, audio_read
+
+
+def stream_mistakes(source: str, follow: bool = False) -> Iterator[Mistake]:
+    """Analyze a live recording and yield mistakes as soon as their intervals close.
+
+    `source` is anything ffmpeg reads - a file (with `follow` read while it grows), a
+    `pipe:` or a stream url with both a video and an audio stream. Audio and video
+    detectors run incrementally, holding only a bounded number of decoded frames and
+    audio chunks.
+    """
+    # Video stack pulls in OpenCV and the models, keep it out of text and audio only imports
+    from analysis_tool.video.detectors import (
+        ExpressionsDetector,
+        OtherPeopleDetector,
+        TurningAwayDetector,
+    )
+    from analysis_tool.video.faces import FaceDetector
+    from analysis_tool.video.mistakes import DETECTION_INTERVAL
+
+    width, height = STREAM_FRAME_SIZE
+    chunk_bytes = AUDIO_SAMPLE_RATE * CHUNK_LENGTH_MS // 1000 * 2  # 16-bit samples
+
+    stderr = tempfile.TemporaryFile()
+    process, audio_read = _start_ffmpeg(source, follow, 1 / DETECTION_INTERVAL, stderr)
+    audio_pipe = os.fdopen(audio_read, "rb")
+    buffer = queue.Queue(maxsize=BUFFER_SIZE)
+    # Set when the consumer is gone, e.g. stopped iterating, so readers must not block
+    stopped = Event()
+    readers = [
+        Thread(
+            target=_read_blocks,
+            args=(
+                process.stdout,
+                "video",
+                width * height * 3,
+                DETECTION_INTERVAL,
+                buffer,
+                stopped,
+            ),
+            daemon=True,
+        ),
+        Thread(
+            target=_read_blocks,
+            args=(
+                audio_pipe,
+                "audio",
+                chunk_bytes,
+                CHUNK_LENGTH_MS / 1e3,
+                buffer,
+                stopped,
+            ),
+            daemon=True,
+        ),
+    ]
+    for reader in readers:
+        reader.start()
+
+    faces = FaceDetector()
+    detectors = [
+        OtherPeopleDetector(),
+        TurningAwayDetector(faces),
+        ExpressionsDetector(faces),
+    ]
+    emitted = [0] * len(detectors)
+    audio = VolumeMistakesStream()
+
+    def newly_closed(closed_only: bool = True) -> Iterator[Mistake]:
+        for i, detector in enumerate(detectors):
+            mistakes = (
+                detector.tracker.closed_mistakes() if closed_only else detector.mistakes
+            )
+            yield from mistakes[emitted[i] :]
+            emitted[i] = len(mistakes)
+
+    try:
+        open_streams = len(readers)
+        while open_streams:
+            kind, current_time, block = buffer.get()
+            if block is None:
+                open_streams -= 1
+            elif kind == "video":
+                frame = np.frombuffer(block, dtype=np.uint8).reshape(height, width, 3)
+                for detector in detectors:
+                    detector.process(frame, current_time)
+                yield from newly_closed()
+            else:
+                samples = np.frombuffer(block, dtype=np.int16)
+                yield from audio.push(samples, AUDIO_SAMPLE_RATE)
+
+        if process.wait() != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"ffmpeg failed: {stderr.read().decode()}")
+
+        for detector in detectors:
+            detector.finish()
+        yield from newly_closed(closed_only=False)
+        yield from audio.finish()
+    finally:
+        # Also runs when the caller stops iterating early (GeneratorExit)
+        stopped.set()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        # Killed ffmpeg closes its end of the pipes, so blocked reads return
+        for reader in readers:
+            reader.join()
+        process.stdout.close()
+        audio_pipe.close()
+        stderr.close()
@@ -0,0 +1,120 @@
+import shutil
+import subprocess
+import threading
+
+import numpy as np
+import pytest
+from hamcrest import assert_that, contains_exactly, has_properties
+
+from analysis_tool.mistakes.mistakes import MistakeCategory, MistakeType
+from analysis_tool.mistakes.models import Mistake
+from analysis_tool.mistakes.stream_mistakes import stream_mistakes
+from analysis_tool.video.frame_source import Detector
+from analysis_tool.video.trackers import Tracker
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None, reason="ffmpeg not installed"
+)
+
+
+class BrightFramesTracker(Tracker):
+    """Bright frames stand for a mistake, closed by the first dark frame"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.bright = False
+
+    def update(self, current_time: float, brightness: float) -> None:
+        if brightness > 100 and not self.bright:
+            self.mistakes.append(
+                Mistake(
+                    type=MistakeType.MOVING,
+                    category=MistakeCategory.VIDEO,
+                    confidence=1,
+                    start_ts=current_time,
+                )
+            )
+        elif brightness <= 100 and self.bright:
+            self.mistakes[-1].end_ts = current_time
+        self.bright = brightness > 100
+
+    def closed_mistakes(self) -> list[Mistake]:
+        return self.mistakes[:-1] if self.bright else self.mistakes
+
+
+class BrightnessDetector(Detector):
+    def __init__(self, faces=None) -> None:
+        super().__init__(BrightFramesTracker())
+
+    def observe(self, frame: np.ndarray) -> float:
+        # Frames are padded to the stream size, only the middle holds the video
+        height, width = frame.shape[:2]
+        return frame[height // 3 : 2 * height // 3, width // 3 : 2 * width // 3].mean()
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch) -> str:
+    """3 seconds, white between 1s and 2s, with a quiet tone"""
+    monkeypatch.setattr(
+        "analysis_tool.video.detectors.OtherPeopleDetector", BrightnessDetector
+    )
+    monkeypatch.setattr(
+        "analysis_tool.video.detectors.TurningAwayDetector", BrightnessDetector
+    )
+    monkeypatch.setattr(
+        "analysis_tool.video.detectors.ExpressionsDetector", BrightnessDetector
+    )
+    monkeypatch.setattr("analysis_tool.video.faces.FaceDetector", lambda: None)
+
+    path = str(tmp_path / "recording.mkv")
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "color=black:s=64x48:r=10:d=1[a];color=white:s=64x48:r=10:d=1[b];"
+            "color=black:s=64x48:r=10:d=1[c];[a][b][c]concat=n=3",
+            "-f",
+            "lavfi",
+            "-i",
+            "sine=frequency=440:duration=3,volume=0.1",
+            "-c:v",
+            "ffv1",
+            path,
+        ],
+        check=True,
+    )
+    return path
+
+
+def test_mistakes_are_streamed_with_their_timestamps(recording):
+    # when
+    mistakes = [
+        mistake
+        for mistake in stream_mistakes(recording)
+        if mistake.category == MistakeCategory.VIDEO
+    ]
+
+    # then
+    assert_that(
+        mistakes,
+        contains_exactly(
+            *[has_properties({"start_ts": 1.0, "end_ts": 2.0})] * 3,
+        ),
+    )
+
+
+def test_stopping_early_ends_ffmpeg_and_readers(recording):
+    # given
+    threads = threading.active_count()
+    stream = stream_mistakes(recording)
+
+    # when
+    next(stream)
+    stream.close()
+
+    # then
+    assert threading.active_count() == threads
@@ -0,0 +1,144 @@
+import os
+from functools import cache
+from importlib import metadata
+from threading import Lock
+from typing import Callable
+
+import numpy as np
+
+from analysis_tool.params import PROJECT_ROOT
+
+YOLO_CONFIG_PATH = os.path.join(PROJECT_ROOT, "analysis_tool", "video", "yolo_config")
+YOLO_MODEL = "yolov4-tiny"
+# Packages bringing their own models, a new version may give different outputs
+MODEL_PACKAGES = (
+    "opencv-python",
+    "opencv-python-headless",
+    "fer",
+    "easyocr",
+    "mediapipe",
+)
+
+# Every model is loaded lazily on first use and kept for the lifetime of the process, so
+# analyzing many videos in one process (or one pool worker) pays the loading cost once
+_load_lock = Lock()
+
+
+def _load_once(loader: Callable) -> Callable:
+    """Like `functools.cache` but two threads asking at once still load the model once"""
+    cached_loader = cache(loader)
+
+    def wrapper():
+        with _load_lock:
+            return cached_loader()
+
+    wrapper.cache_clear = cached_loader.cache_clear
+    return wrapper
+
+
+@_load_once
+def get_emotion_detector():
+    from fer import FER
+
+    return FER()
+
+
+@_load_once
+def get_yolo():
+    """YOLO network together with names of its output layers"""
+    import cv2
+
+    net = cv2.dnn.readNet(
+        os.path.join(YOLO_CONFIG_PATH, f"{YOLO_MODEL}.weights"),
+        os.path.join(YOLO_CONFIG_PATH, f"{YOLO_MODEL}.cfg"),
+    )
+    layer_names = net.getLayerNames()
+    output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
+    return net, output_layers
+
+
+@_load_once
+def get_ocr_reader():
+    import easyocr
+
+    return easyocr.Reader(["pl"])
+
+
+@_load_once
+def get_face_cascade():
+    import cv2
+
+    return cv2.CascadeClassifier(
+        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+    )
+
+
+@_load_once
+def get_hands():
+    import mediapipe as mp
+
+    return mp.solutions.hands.Hands(max_num_hands=2, min_detection_confidence=0.7)
+
+
+@_load_once
+def get_polish_nlp():
+    """Polish spaCy pipeline, installed with `python -m spacy download pl_core_news_sm`"""
+    import spacy
+
+    # Only tags, morphology and dependencies are needed
+    return spacy.load("pl_core_news_sm", exclude=["ner", "lemmatizer"])
+
+
+def model_versions() -> dict[str, str | None]:
+    """Installed versions of the model packages, `None` for missing ones"""
+    versions: dict[str, str | None] = {"yolo": YOLO_MODEL}
+    for package in MODEL_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def _warm_up_emotion_detector() -> None:
+    # Passing the face rectangle skips face detection and runs the classifier graph
+    blank_face = np.zeros((64, 64, 3), dtype=np.uint8)
+    get_emotion_detector().detect_emotions(blank_face, face_rectangles=[(0, 0, 64, 64)])
+
+
+def _warm_up_yolo() -> None:
+    net, output_layers = get_yolo()
+    net.setInput(np.zeros((1, 3, 416, 416), dtype=np.float32))
+    net.forward(output_layers)
+
+
+def _warm_up_ocr_reader() -> None:
+    get_ocr_reader().readtext(np.zeros((64, 256), dtype=np.uint8))
+
+
+def _warm_up_face_cascade() -> None:
+    get_face_cascade().detectMultiScale(np.zeros((64, 64), dtype=np.uint8))
+
+
+def _warm_up_hands() -> None:
+    hands = get_hands()
+    hands.process(np.zeros((64, 64, 3), dtype=np.uint8))
+    hands.reset()
+
+
+MODEL_WARM_UPS: dict[str, Callable[[], None]] = {
+    "emotions": _warm_up_emotion_detector,
+    "yolo": _warm_up_yolo,
+    "ocr": _warm_up_ocr_reader,
+    "face_cascade": _warm_up_face_cascade,
+    "hands": _warm_up_hands,
+}
+
+
+def warm_up(*model_names: str) -> None:
+    """Load models (all by default) and run a dummy inference so the first frame is not slow.
+
+    Meant to be called at worker startup, e.g. as a `ProcessPoolExecutor` initializer.
+    """
+    for name in model_names or MODEL_WARM_UPS:
+        MODEL_WARM_UPS[name]()
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import random
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Awaitable, Callable, TypeVar
+
+from analysis_tool.params import load_envs
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+T = TypeVar("T")
+
+# Requests in flight at once, across all callers in the process
+MAX_CONCURRENT_REQUESTS = 8
+# Sustained request rate and how many requests may go out at once after a quiet period
+REQUESTS_PER_MINUTE = 50
+REQUEST_BURST = 10
+MAX_ATTEMPTS = 5
+# Upper bound of the first retry delay, doubled with every further attempt
+RETRY_BASE_DELAY = 1.0  # seconds
+# Longest pause asked for by the server that is still respected
+MAX_RETRY_AFTER = 60.0  # seconds
+# Metrics of this many latest requests are kept
+METRICS_KEPT = 1000
+
+
+class TokenBucket:
+    """Lets through `rate` requests per second on average and at most `capacity` at once"""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class RequestMetrics:
+    name: str
+    latency: float  # seconds, from the first attempt to the final response
+    attempts: int
+    succeeded: bool
+
+
+class SharedClient:
+    """One async OpenAI client for the whole process, driven by a background event loop.
+
+    Connections are reused between requests. Concurrency and request rate are limited
+    for all callers together, rate limit (429) and server errors are retried with
+    exponential backoff and full jitter. Synchronous code calls `run`, several requests
+    sent at once go through `run_all`. `close` stops the event loop.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None = None,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        requests_per_minute: float = REQUESTS_PER_MINUTE,
+        burst: int = REQUEST_BURST,
+        max_attempts: int = MAX_ATTEMPTS,
+    ) -> None:
+        from openai import AsyncOpenAI
+
+        self.max_attempts = max_attempts
+        self.metrics: deque[RequestMetrics] = deque(maxlen=METRICS_KEPT)
+
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = Thread(target=self.loop.run_forever, daemon=True)
+        self.loop_thread.start()
+
+        async def create_in_loop() -> None:
+            # Retries are handled here, where they respect the shared limits
+            self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+            self.semaphore = asyncio.Semaphore(max_concurrency)
+            self.bucket = TokenBucket(requests_per_minute / 60, burst)
+
+        asyncio.run_coroutine_threadsafe(create_in_loop(), self.loop).result()
+
+    def run(self, name: str, request: Callable[["AsyncOpenAI"], Awaitable[T]]) -> T:
+        """Send `request(client)` and wait for its result in the calling thread"""
+        return asyncio.run_coroutine_threadsafe(
+            self._send(name, request), self.loop
+        ).result()
+
+    def run_all(
+        self, name: str, requests: list[Callable[["AsyncOpenAI"], Awaitable[T]]]
+    ) -> list[T]:
+        """Send all requests concurrently, results are in the order of `requests`"""
+
+        async def send_all() -> list[T]:
+            return await asyncio.gather(
+                *(self._send(name, request) for request in requests)
+            )
+
+        return asyncio.run_coroutine_threadsafe(send_all(), self.loop).result()
+
+    def close(self) -> None:
+        """Close the connections and stop the event loop, the client can't be used after"""
+        asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+        self.loop.close()
+
+    def latency_summary(self) -> dict[str, dict[str, float]]:
+        """Count, mean and 95th percentile of latency of succeeded requests by name"""
+        latencies: dict[str, list[float]] = {}
+        for metrics in self.metrics:
+            if metrics.succeeded:
+                latencies.setdefault(metrics.name, []).append(metrics.latency)
+
+        return {
+            name: {
+                "count": len(values),
+                "mean": statistics.mean(values),
+                "p95": (
+                    statistics.quantiles(values, n=20)[-1]
+                    if len(values) > 1
+                    else values[0]
+                ),
+            }
+            for name, values in latencies.items()
+        }
+
+    async def _send(
+        self, name: str, request: Callable[["AsyncOpenAI"], Awaitable[T]]
+    ) -> T:
+        from openai import APIConnectionError, InternalServerError, RateLimitError
+
+        started_at = time.perf_counter()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                # Waiting for a retry doesn't hold a slot other requests could use
+                async with self.semaphore:
+                    await self.bucket.acquire()
+                    result = await request(self.client)
+            except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                if attempt == self.max_attempts:
+                    self._record(name, started_at, attempt, succeeded=False)
+                    raise
+                await asyncio.sleep(self._retry_delay(e, attempt))
+            except Exception:
+                self._record(name, started_at, attempt, succeeded=False)
+                raise
+            else:
+                self._record(name, started_at, attempt, succeeded=True)
+                return result
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        # Server asks for a specific pause when rate limiting
+        response = getattr(error, "response", None)
+        retry_after = (
+            response.headers.get("retry-after") if response is not None else None
+        )
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), MAX_RETRY_AFTER)
+            except ValueError:
+                pass
+        return random.uniform(0, RETRY_BASE_DELAY * 2 ** (attempt - 1))
+
+    def _record(
+        self, name: str, started_at: float, attempts: int, succeeded: bool
+    ) -> None:
+        latency = time.perf_counter() - started_at
+        self.metrics.append(RequestMetrics(name, latency, attempts, succeeded))
+
+
+_client_lock = Lock()
+_clients: dict[int, SharedClient] = {}
+
+
+def get_openai_client() -> SharedClient:
+    """Client of the current process, forked workers create their own"""
+    with _client_lock:
+        pid = os.getpid()
+        if pid not in _clients:
+            _clients[pid] = SharedClient(api_key=load_envs().OPENAPI_KEY)
+        return _clients[pid]
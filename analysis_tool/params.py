@@ -1,10 +1,19 @@
 import os
 from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 VIDEO_FILES_PATH = os.path.join(PROJECT_ROOT, "video_files")
 AUDIO_FILES_PATH = os.path.join(PROJECT_ROOT, "audio_files")
+# Caches of model outputs, kept out of the source tree
+CACHE_PATH = os.environ.get(
+    "ANALYSIS_TOOL_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "speech-analysis-tool"),
+)
+# Video frames are decoded at most this wide, models see at most 640 wide frames (YOLO
+# 416, faces 640), subtitles are still readable for OCR
+ANALYSIS_WIDTH = 960
 
 
 @dataclass
@@ -12,11 +21,13 @@ class Envs:
     OPENAPI_KEY: str
 
 
+@cache
 def load_envs() -> Envs:
+    """Read once per process, `.env` doesn't change while analysis runs"""
     envs = {}
     with open(f"{PROJECT_ROOT}/.env", "r") as f:
         for line in f:
             key, value = line.split("=", 1)
-            envs[key] = value
+            envs[key] = value.strip()
 
     return Envs(**envs)
@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+import pytest
+
+from analysis_tool.params import PROJECT_ROOT
+
+HEAVY_MODULES = [
+    "tensorflow",
+    "torch",
+    "keras",
+    "mediapipe",
+    "fer",
+    "easyocr",
+    "cv2",
+    "openai",
+    "scipy",
+    "spacy",
+]
+
+
+def _imported_heavy_modules(module: str) -> list[str]:
+    """Import `module` in a fresh interpreter and list heavy modules it loaded"""
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "analysis_tool.text.mistakes",
+        "analysis_tool.text.text_errors_parser",
+        "analysis_tool.audio.mistakes",
+        "analysis_tool.audio.volume_analyzer",
+        "analysis_tool.mistakes.extract_mistakes",
+    ],
+)
+def test_import_does_not_load_heavy_dependencies(module):
+    assert _imported_heavy_modules(module) == []
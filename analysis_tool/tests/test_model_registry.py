@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from hamcrest import assert_that, equal_to
+
+from analysis_tool import model_registry
+from analysis_tool.model_registry import _load_once, warm_up
+
+
+def test_model_is_loaded_once_by_concurrent_callers():
+    # given
+    loads = []
+
+    @_load_once
+    def get_model():
+        loads.append(1)
+        time.sleep(0.05)  # Slow load, other threads ask for the model meanwhile
+        return object()
+
+    # when
+    with ThreadPoolExecutor(8) as executor:
+        models = list(executor.map(lambda _: get_model(), range(8)))
+
+    # then
+    assert_that(len(loads), equal_to(1))
+    assert all(model is models[0] for model in models)
+
+
+def test_warm_up_loads_and_runs_every_model(monkeypatch):
+    # given
+    getters = {
+        "get_emotion_detector": MagicMock(),
+        "get_yolo": MagicMock(return_value=(MagicMock(), ["output"])),
+        "get_ocr_reader": MagicMock(),
+        "get_face_cascade": MagicMock(),
+        "get_hands": MagicMock(),
+    }
+    for name, getter in getters.items():
+        monkeypatch.setattr(model_registry, name, getter)
+
+    # when
+    warm_up()
+
+    # then
+    for getter in getters.values():
+        getter.assert_called()
+    net, _ = getters["get_yolo"].return_value
+    net.forward.assert_called_once_with(["output"])
+    getters["get_hands"].return_value.reset.assert_called_once()
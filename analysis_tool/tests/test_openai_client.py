@@ -0,0 +1,48 @@
+import httpx
+from hamcrest import assert_that, equal_to
+from openai import RateLimitError
+
+from analysis_tool.openai_client import MAX_RETRY_AFTER, SharedClient
+
+
+def _rate_limit_error(retry_after: str) -> RateLimitError:
+    request = httpx.Request("POST", "http://127.0.0.1/v1/chat/completions")
+    response = httpx.Response(
+        429, headers={"retry-after": retry_after}, request=request
+    )
+    return RateLimitError("Rate limited", response=response, body=None)
+
+
+def test_retry_after_is_clamped():
+    assert_that(SharedClient._retry_delay(_rate_limit_error("0.5"), 1), equal_to(0.5))
+    assert_that(
+        SharedClient._retry_delay(_rate_limit_error("3600"), 1),
+        equal_to(MAX_RETRY_AFTER),
+    )
+
+
+def test_waiting_for_retry_lets_other_requests_through():
+    # given
+    client = SharedClient(api_key="test", max_concurrency=1)
+    finished = []
+    attempts = []
+
+    async def rate_limited_once(api) -> None:
+        attempts.append("first")
+        if len(attempts) == 1:
+            raise _rate_limit_error("0.2")
+        finished.append("first")
+
+    async def second(api) -> None:
+        finished.append("second")
+
+    # when
+    try:
+        client.run_all("test", [rate_limited_once, second])
+    finally:
+        client.close()
+
+    # then
+    assert_that(finished, equal_to(["second", "first"]))
+    assert_that([metrics.attempts for metrics in client.metrics], equal_to([1, 2]))
+    assert_that(client.loop_thread.is_alive(), equal_to(False))
@@ -0,0 +1,41 @@
+from openai.types.audio import TranscriptionVerbose, TranscriptionWord
+from openai.types.audio.transcription_segment import TranscriptionSegment
+
+
+def make_transcript(
+    text: str,
+    word_step: float = 1,
+    segments: list[TranscriptionSegment] | None = None,
+) -> TranscriptionVerbose:
+    """Transcript saying a word of `text` every `word_step` seconds, each for half of it.
+
+    Words are without punctuation, as Whisper gives them.
+    """
+    words = [word.strip(".,?!") for word in text.split()]
+    return TranscriptionVerbose(
+        duration=str(len(words) * word_step),
+        language="polish",
+        text=text,
+        segments=segments,
+        words=[
+            TranscriptionWord(start=i * word_step, end=(i + 0.5) * word_step, word=word)
+            for i, word in enumerate(words)
+        ],
+    )
+
+
+def make_segment(
+    segment_id: int, start: float, end: float, text: str
+) -> TranscriptionSegment:
+    return TranscriptionSegment(
+        id=segment_id,
+        seek=0,
+        start=start,
+        end=end,
+        text=text,
+        tokens=[],
+        temperature=0.0,
+        avg_logprob=0.0,
+        compression_ratio=1.0,
+        no_speech_prob=0.0,
+    )
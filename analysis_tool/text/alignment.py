@@ -0,0 +1,167 @@
+import difflib
+import string
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai.types.audio import TranscriptionWord
+
+# Transcript words aligned at once, alignment inside a window is quadratic in its size
+ALIGNMENT_WINDOW = 200
+# Subtitles are OCR-ed every few frames and rarely shown exactly while the words are said
+CUE_TIME_TOLERANCE = 5.0  # seconds
+# Windows are only committed up to a match this long, single common words like "w" or
+# "i" match by chance where subtitles of a whole passage are missing
+MIN_ANCHOR_TOKENS = 3
+
+
+@dataclass
+class SubtitleCue:
+    """Subtitle text with the times it was first and last seen, if known"""
+
+    text: str
+    start_ts: float | None = None
+    end_ts: float | None = None
+
+
+@dataclass
+class DivergentSpan:
+    transcript: str
+    subtitles: str
+    start_ts: float
+    end_ts: float
+    similarity: float  # `difflib.SequenceMatcher` ratio of the two texts
+
+
+@dataclass
+class _Token:
+    text: str
+    start_ts: float | None
+    end_ts: float | None
+
+
+def clean_string(text: str) -> str:
+    translator = str.maketrans("", "", string.punctuation)
+    return text.translate(translator).lower()
+
+
+def align_subtitles(
+    words: list["TranscriptionWord"],
+    cues: list[SubtitleCue],
+    window: int = ALIGNMENT_WINDOW,
+) -> list[DivergentSpan]:
+    """Spans where the spoken words and the subtitles differ.
+
+    Words are aligned window by window. Every window is committed up to its last
+    matching block of at least `MIN_ANCHOR_TOKENS` words and the next one starts right
+    after it, so the total time stays linear in the length of the talk. Spoken words of
+    a window without such a match are divergent, the subtitles are looked for again
+    in the next window. Subtitle words are only looked for among cues seen up to
+    `CUE_TIME_TOLERANCE` after the last word of the window, if cue times are known.
+    """
+    spoken = [
+        _Token(text, word.start, word.end)
+        for word in words
+        for text in clean_string(word.word).split()
+    ]
+    shown = [
+        _Token(text, cue.start_ts, cue.end_ts)
+        for cue in cues
+        for text in clean_string(cue.text).split()
+    ]
+
+    # (start, end) of the divergent spoken and shown tokens
+    divergent: list[tuple[int, int, int, int]] = []
+    i = j = 0
+    while i < len(spoken) or j < len(shown):
+        i_end = min(i + window, len(spoken))
+        until = spoken[i_end - 1].end_ts if i_end > i else None
+        j_end = _shown_window_end(shown, j, until, 2 * window)
+
+        matcher = difflib.SequenceMatcher(
+            None,
+            [token.text for token in spoken[i:i_end]],
+            [token.text for token in shown[j:j_end]],
+            autojunk=False,
+        )
+        blocks = [block for block in matcher.get_matching_blocks() if block.size]
+        last_window = i_end == len(spoken) and j_end == len(shown)
+        if not last_window:
+            anchors = [k for k, b in enumerate(blocks) if b.size >= MIN_ANCHOR_TOKENS]
+            blocks = blocks[: anchors[-1] + 1] if anchors else []
+
+        previous_i, previous_j = i, j
+        for block in blocks:
+            _add_divergent(divergent, previous_i, i + block.a, previous_j, j + block.b)
+            previous_i, previous_j = i + block.a + block.size, j + block.b + block.size
+
+        if last_window or (not blocks and i_end == i):
+            _add_divergent(divergent, previous_i, i_end, previous_j, j_end)
+            i, j = i_end, j_end
+        elif not blocks:
+            # Words said but never shown, their subtitles may still come
+            _add_divergent(divergent, i, i_end, j, j)
+            i = i_end
+        else:
+            # The rest of the window may still match words of the next one
+            i, j = previous_i, previous_j
+
+    return [_span(spoken, shown, *indices) for indices in divergent]
+
+
+def _shown_window_end(
+    shown: list[_Token], start: int, until: float | None, size: int
+) -> int:
+    end = min(start + size, len(shown))
+    if until is None:
+        return end
+
+    for k in range(start, end):
+        if (
+            shown[k].start_ts is not None
+            and shown[k].start_ts > until + CUE_TIME_TOLERANCE
+        ):
+            return k
+    return end
+
+
+def _add_divergent(
+    divergent: list[tuple[int, int, int, int]],
+    i_start: int,
+    i_end: int,
+    j_start: int,
+    j_end: int,
+) -> None:
+    if i_start == i_end and j_start == j_end:
+        return
+
+    # Divergence continuing in the next window is still one span
+    if divergent and divergent[-1][1] == i_start and divergent[-1][3] == j_start:
+        i_start, _, j_start, _ = divergent.pop()
+    divergent.append((i_start, i_end, j_start, j_end))
+
+
+def _span(
+    spoken: list[_Token],
+    shown: list[_Token],
+    i_start: int,
+    i_end: int,
+    j_start: int,
+    j_end: int,
+) -> DivergentSpan:
+    if i_end > i_start:
+        start_ts, end_ts = spoken[i_start].start_ts, spoken[i_end - 1].end_ts
+    else:
+        # Subtitle words never said, they belong between the neighbouring spoken words
+        start_ts = spoken[i_start - 1].end_ts if i_start > 0 else 0
+        end_ts = spoken[i_start].start_ts if i_start < len(spoken) else start_ts
+
+    transcript = " ".join(token.text for token in spoken[i_start:i_end])
+    subtitles = " ".join(token.text for token in shown[j_start:j_end])
+    return DivergentSpan(
+        transcript=transcript,
+        subtitles=subtitles,
+        start_ts=start_ts,
+        end_ts=end_ts,
+        similarity=difflib.SequenceMatcher(None, transcript, subtitles).ratio(),
+    )
@@ -1,77 +1,179 @@
-import difflib
-import string
+from typing import TYPE_CHECKING
 
-from openai.types.audio import TranscriptionVerbose
+import numpy as np
 
 from analysis_tool.audio.openai_api import recognize_passive_voice_words
 from analysis_tool.mistakes.mistakes import MistakeType, MistakeCategory
 from analysis_tool.mistakes.models import Mistake
+from analysis_tool.text.alignment import SubtitleCue, align_subtitles, clean_string
+from analysis_tool.text.passive_voice import find_passive_voice_words
+from analysis_tool.text.repetitions import find_repetitions
+from analysis_tool.text.transcript_index import TranscriptIndex
+from analysis_tool.text.windowed import (
+    fog_index,
+    intervals_above,
+    number_density,
+    speech_pace,
+    window_durations,
+    window_starts,
+)
+
+if TYPE_CHECKING:
+    from openai.types.audio import TranscriptionVerbose
 
 LONG_PAUSE_THRESHOLD = 2
+# Saying a similar word again after this many seconds is no longer a repetition
+REPETITION_WINDOW = 10
+# Differences this small between spoken words and subtitles are OCR or spelling noise
+SUBTITLE_NOISE_SIMILARITY = 0.8
+
+# Pace, numbers and FOG index are measured in windows of this length every hop
+METRIC_WINDOW = 60  # seconds
+METRIC_HOP = 10  # seconds
+TOO_FAST_SPEAKING = 160  # words per minute
+TOO_MANY_NUMBERS = 8  # numbers per minute
+# Text of higher FOG index is hard to follow when only heard
+TOO_DIFFICULT_FOG_INDEX = 18
+
+
+def get_text_mistakes(transcription: "TranscriptionVerbose") -> list[Mistake]:
+    index = TranscriptIndex.from_transcript(transcription)
+    pauses = find_pauses(transcription, index)
+    repetitions = find_repeated_words(transcription, index=index)
+    passive_voice_mistakes = find_passive_voice(transcription, index=index)
+    windowed_mistakes = find_windowed_mistakes(transcription, index=index)
+
+    return [*pauses, *repetitions, *passive_voice_mistakes, *windowed_mistakes]
+
+
+def find_pauses(
+    transcription: "TranscriptionVerbose", index: TranscriptIndex | None = None
+) -> list[Mistake]:
+    if index is None:
+        index = TranscriptIndex.from_transcript(transcription)
+    pause_starts = index.end[:-1]
+    pause_ends = index.start[1:]
+    long_pauses = np.flatnonzero(pause_ends - pause_starts > LONG_PAUSE_THRESHOLD)
 
+    return [
+        Mistake(
+            type=MistakeType.PAUSING,
+            category=MistakeCategory.TEXT,
+            confidence=1,
+            start_ts=float(pause_starts[i]),
+            end_ts=float(pause_ends[i]),
+        )
+        for i in long_pauses
+    ]
 
-def get_text_mistakes(transcription: TranscriptionVerbose) -> list[Mistake]:
-    pauses = find_pauses(transcription)
-    passive_voice_mistakes = find_passive_voice(transcription)
 
-    return [*pauses, *passive_voice_mistakes]
+def find_repeated_words(
+    transcription: "TranscriptionVerbose",
+    window: float | None = REPETITION_WINDOW,
+    index: TranscriptIndex | None = None,
+) -> list[Mistake]:
+    if index is None:
+        index = TranscriptIndex.from_transcript(transcription)
+    return [
+        Mistake(
+            type=MistakeType.REPETITIONS,
+            category=MistakeCategory.TEXT,
+            confidence=1,
+            start_ts=repetition.start_ts,
+            end_ts=repetition.end_ts,
+            detail=f"{repetition.first_word} / {repetition.second_word}",
+        )
+        for repetition in find_repetitions(index, window)
+    ]
 
 
-def find_pauses(transcription: TranscriptionVerbose) -> list[Mistake]:
-    if len(transcription.words) < 2:
+def find_windowed_mistakes(
+    transcription: "TranscriptionVerbose",
+    window: float = METRIC_WINDOW,
+    hop: float = METRIC_HOP,
+    index: TranscriptIndex | None = None,
+) -> list[Mistake]:
+    """Passages where pace, numbers or FOG index of a sliding window cross the limit"""
+    if index is None:
+        index = TranscriptIndex.from_transcript(transcription)
+    starts = window_starts(index, window, hop)
+    if not len(starts):
         return []
+    ends = starts + window_durations(index, starts, window)
+
+    metrics = [
+        (MistakeType.SPEAKING_TOO_FAST, speech_pace, TOO_FAST_SPEAKING, "words/min"),
+        (MistakeType.TOO_MANY_NUMBERS, number_density, TOO_MANY_NUMBERS, "numbers/min"),
+        (MistakeType.LONG_DIFFICULT_WORDS, fog_index, TOO_DIFFICULT_FOG_INDEX, "FOG"),
+    ]
+    return [
+        Mistake(
+            type=mistake_type,
+            category=MistakeCategory.TEXT,
+            confidence=1,
+            start_ts=start,
+            end_ts=end,
+            detail=f"{peak:.0f} {unit}",
+        )
+        for mistake_type, metric, threshold, unit in metrics
+        for start, end, peak in intervals_above(
+            starts, ends, metric(index, starts, window), threshold
+        )
+    ]
+
+
+def compare_transcription(
+    transcription: "TranscriptionVerbose", subtitles: list[SubtitleCue] | str
+) -> list[Mistake]:
+    """One mistake per span where subtitles differ from what was said.
+
+    Plain subtitle text without cue times is aligned by word order only.
+    """
+    if isinstance(subtitles, str):
+        subtitles = [SubtitleCue(subtitles)]
+    if not any(clean_string(cue.text).strip() for cue in subtitles):
+        return []  # Video without subtitles, nothing to compare
+
+    return [
+        Mistake(
+            type=MistakeType.INCONSISTENT_TRANSCRIPT,
+            category=MistakeCategory.VIDEO,
+            confidence=1 - span.similarity,
+            start_ts=span.start_ts,
+            end_ts=span.end_ts,
+            detail=f"{span.transcript} / {span.subtitles}",
+        )
+        for span in align_subtitles(transcription.words, subtitles)
+        if span.similarity < SUBTITLE_NOISE_SIMILARITY
+    ]
+
 
-    mistakes = []
-    for previous_word, next_word in zip(
-        transcription.words[:-1], transcription.words[1:]
-    ):
-        if next_word.start - previous_word.end > LONG_PAUSE_THRESHOLD:
-            mistakes.append(
-                Mistake(
-                    type=MistakeType.PAUSING,
-                    category=MistakeCategory.TEXT,
-                    confidence=1,
-                    start_ts=previous_word.end,
-                    end_ts=next_word.start,
-                )
-            )
-
-    return mistakes
-
-
-def compare_transcription(transcription: str, subtitles: str) -> list[Mistake]:
-    similarity_ratio = difflib.SequenceMatcher(
-        None, clean_string(transcription), clean_string(subtitles)
-    ).ratio()
-    threshold = 0.98
-
-    if similarity_ratio < threshold:
-        confidence = max(similarity_ratio**3 - 0.5, 0)
-        return [
-            Mistake(
-                type=MistakeType.INCONSISTENT_TRANSCRIPT,
-                category=MistakeCategory.VIDEO,
-                start_ts=0,
-                confidence=confidence,
-            )
-        ]
-
-
-def clean_string(text: str) -> str:
-    translator = str.maketrans("", "", string.punctuation)
-    return text.translate(translator).lower()
-
-
-def find_passive_voice(transcription: TranscriptionVerbose) -> list[Mistake]:
-    passive_voice_words = recognize_passive_voice_words(transcription)
+def find_passive_voice(
+    transcription: "TranscriptionVerbose",
+    use_gpt: bool = False,
+    index: TranscriptIndex | None = None,
+) -> list[Mistake]:
+    """Detected locally with spaCy, GPT is asked when requested or spaCy isn't installed"""
+    if index is None:
+        index = TranscriptIndex.from_transcript(transcription)
+    word_indices = None
+    if not use_gpt:
+        try:
+            [word_indices] = find_passive_voice_words([index])
+        except (ImportError, OSError) as e:
+            # spaCy raises OSError when the Polish model isn't downloaded
+            print(f"Local passive voice detection unavailable ({e}), asking GPT")
+
+    if word_indices is None:
+        word_indices = recognize_passive_voice_words(transcription, index)
 
     return [
         Mistake(
             type=MistakeType.PASSIVE_SIDE,
             category=MistakeCategory.TEXT,
             confidence=1,
-            start_ts=word.start,
-            end_ts=word.end,
+            start_ts=float(index.start[i]),
+            end_ts=float(index.end[i]),
         )
-        for word in passive_voice_words
+        for i in word_indices
     ]
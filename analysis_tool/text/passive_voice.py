@@ -0,0 +1,41 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from analysis_tool.model_registry import get_polish_nlp
+from analysis_tool.text.transcript_index import TranscriptIndex
+
+if TYPE_CHECKING:
+    from spacy.tokens import Token
+
+# Impersonal "-no/-to" forms, e.g. "podano", "wskazano", "podsumowano"
+IMPERSONAL_TAG = "IMPS"
+# Children marking their head as a passive verb, e.g. "został" in "wynik został podany"
+PASSIVE_DEPENDENCIES = {"aux:pass", "nsubj:pass", "csubj:pass"}
+NLP_BATCH_SIZE = 16
+
+
+def find_passive_voice_words(indexes: list[TranscriptIndex]) -> list[np.ndarray]:
+    """Indices of passive construction words of every transcript, parsed in one batch"""
+    if not indexes:
+        return []
+
+    docs = get_polish_nlp().pipe(
+        (index.text for index in indexes), batch_size=NLP_BATCH_SIZE
+    )
+    return [
+        np.unique(
+            np.array(
+                [index.word_at(token.idx) for token in doc if is_passive(token)],
+                dtype=np.int64,
+            )
+        )
+        for index, doc in zip(indexes, docs)
+    ]
+
+
+def is_passive(token: "Token") -> bool:
+    if token.tag_ == IMPERSONAL_TAG or "Imps" in token.morph.get("VerbForm"):
+        return True
+    # Passive participles used as plain adjectives, like "zamknięte drzwi", are fine
+    return any(child.dep_ in PASSIVE_DEPENDENCIES for child in token.children)
@@ -0,0 +1,112 @@
+import difflib
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from analysis_tool.text.transcript_index import TranscriptIndex
+
+# `difflib.SequenceMatcher` ratio above which two words count as the same word
+SIMILARITY_THRESHOLD = 0.7
+# Shorter words are mostly connectors like `i` or `na`
+MIN_REPEATED_WORD_LENGTH = 3
+
+
+@dataclass
+class Repetition:
+    first_index: int
+    second_index: int
+    first_word: str
+    second_word: str
+    start_ts: float  # start of the first word
+    end_ts: float  # end of the second word
+
+
+class _SimilarWordsIndex:
+    """Distinct lowercase words bucketed by first letter and length.
+
+    Every new word is compared only with words of the same first letter and of a length
+    that can reach the threshold, a character count bound prunes most of those before
+    the exact `SequenceMatcher` ratio. Similar words are remembered, so each pair of
+    distinct words is compared at most once however often they are said.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self.buckets: dict[tuple[str, int], list[str]] = defaultdict(list)
+        self.letter_counts: dict[str, Counter] = {}
+        self.similar: dict[str, list[str]] = {}
+
+    def similar_words(self, word: str) -> list[str]:
+        """Known words similar to `word`, including itself"""
+        if word not in self.similar:
+            self._add(word)
+        return self.similar[word]
+
+    def _add(self, word: str) -> None:
+        counts = Counter(word)
+        similar = [word]
+        for length in self._length_band(len(word)):
+            for other in self.buckets[word[0], length]:
+                if self._is_similar(word, counts, other):
+                    similar.append(other)
+                    self.similar[other].append(word)
+
+        self.buckets[word[0], len(word)].append(word)
+        self.letter_counts[word] = counts
+        self.similar[word] = similar
+
+    def _length_band(self, length: int) -> range:
+        # Ratio is at most 2 * min(length, other) / (length + other)
+        shortest = int(length * self.threshold / (2 - self.threshold)) + 1
+        longest = int(length * (2 - self.threshold) / self.threshold)
+        return range(shortest, longest + 1)
+
+    def _is_similar(self, word: str, counts: Counter, other: str) -> bool:
+        total_length = len(word) + len(other)
+        # Matching blocks can't share more characters than both words contain
+        common = sum((counts & self.letter_counts[other]).values())
+        if 2 * common / total_length <= self.threshold:
+            return False
+        return difflib.SequenceMatcher(None, word, other).ratio() > self.threshold
+
+
+def find_repetitions(
+    transcript: TranscriptIndex,
+    window: float | None = None,
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> list[Repetition]:
+    """Pair every word with the latest earlier similar word starting with the same letter.
+
+    With `window` (seconds), only words said at most that long before are considered.
+    """
+    similar_index = _SimilarWordsIndex(threshold)
+    last_said: dict[str, int] = {}
+    repetitions = []
+
+    for i, word in enumerate(transcript.words):
+        form = word.lower()
+        if not form:
+            continue
+
+        similar_words = similar_index.similar_words(form)
+        if len(form) >= MIN_REPEATED_WORD_LENGTH:
+            previous = max(
+                (last_said[other] for other in similar_words if other in last_said),
+                default=None,
+            )
+            if previous is not None and (
+                window is None
+                or transcript.start[i] - transcript.end[previous] <= window
+            ):
+                repetitions.append(
+                    Repetition(
+                        first_index=previous,
+                        second_index=i,
+                        first_word=transcript.words[previous],
+                        second_word=word,
+                        start_ts=float(transcript.start[previous]),
+                        end_ts=float(transcript.end[i]),
+                    )
+                )
+        last_said[form] = i
+
+    return repetitions
@@ -0,0 +1,70 @@
+from hamcrest import assert_that, contains_exactly, empty, has_properties
+
+from analysis_tool.mistakes.mistakes import MistakeType
+from analysis_tool.tests.transcripts import make_transcript
+from analysis_tool.text.alignment import SubtitleCue
+from analysis_tool.text.mistakes import compare_transcription
+
+
+def test_divergent_subtitles_are_localized():
+    # given
+    transcript = make_transcript(
+        "Dzień dobry, dziś opowiem o wynikach sprzedaży w trzecim kwartale roku."
+    )
+    cues = [
+        SubtitleCue("Dzień dobry, dziś opowiem", 0, 3),
+        SubtitleCue("o kosztach sprzedaży", 4, 6),
+        SubtitleCue("w trzecim kwartale roku", 7, 10),
+    ]
+
+    # when
+    mistakes = compare_transcription(transcript, cues)
+
+    # then
+    assert_that(
+        mistakes,
+        contains_exactly(
+            has_properties(
+                type=MistakeType.INCONSISTENT_TRANSCRIPT,
+                start_ts=5,
+                end_ts=5.5,
+                detail="wynikach / kosztach",
+            )
+        ),
+    )
+
+
+def test_matching_subtitles_across_windows():
+    # given
+    text = " ".join(f"słowo{i % 50}" for i in range(1000))
+    transcript = make_transcript(text)
+    cues = [SubtitleCue(text.replace("słowo7 ", "slowo7 "))]
+
+    # when
+    mistakes = compare_transcription(transcript, cues)
+
+    # then
+    assert_that(mistakes, empty())
+
+
+def test_missing_subtitle_passage_is_one_mistake():
+    # given
+    spoken = [f"słowo{i % 7}" if i % 3 else f"termin{i}" for i in range(600)]
+    transcript = make_transcript(" ".join(spoken))
+    # Subtitles of the middle passage never appeared
+    cues = [SubtitleCue(" ".join(spoken[:250] + spoken[450:]))]
+
+    # when
+    mistakes = compare_transcription(transcript, cues)
+
+    # then
+    assert_that(
+        mistakes,
+        contains_exactly(
+            has_properties(
+                start_ts=250,
+                end_ts=449.5,
+                detail=" ".join(spoken[250:450]).lower() + " / ",
+            )
+        ),
+    )
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from hamcrest import assert_that, contains_exactly, has_properties
+
+from analysis_tool.mistakes.mistakes import MistakeType
+from analysis_tool.tests.transcripts import make_transcript
+from analysis_tool.text.mistakes import find_passive_voice
+
+
+def test_passive_voice_found_locally():
+    # given
+    pytest.importorskip("spacy")
+    from spacy.util import is_package
+
+    if not is_package("pl_core_news_sm"):
+        pytest.skip("pl_core_news_sm not downloaded")
+    transcript = make_transcript(
+        "Wynik został podany wczoraj. Na końcu podsumowano wykład. Zamknięte drzwi skrzypią."
+    )
+
+    # when
+    mistakes = find_passive_voice(transcript)
+
+    # then
+    assert_that(
+        mistakes,
+        contains_exactly(
+            has_properties({"type": MistakeType.PASSIVE_SIDE, "start_ts": 2}),
+            has_properties({"type": MistakeType.PASSIVE_SIDE, "start_ts": 6}),
+        ),
+    )
+
+
+def test_gpt_asked_without_local_model(monkeypatch):
+    # given
+    transcript = make_transcript("Podano wynik")
+
+    def model_missing():
+        raise OSError("Can't find model 'pl_core_news_sm'")
+
+    monkeypatch.setattr(
+        "analysis_tool.text.passive_voice.get_polish_nlp", model_missing
+    )
+    monkeypatch.setattr(
+        "analysis_tool.text.mistakes.recognize_passive_voice_words",
+        lambda transcription, index: np.array([0]),
+    )
+
+    # when
+    mistakes = find_passive_voice(transcript)
+
+    # then
+    assert_that(
+        mistakes,
+        contains_exactly(
+            has_properties({"type": MistakeType.PASSIVE_SIDE, "start_ts": 0})
+        ),
+    )
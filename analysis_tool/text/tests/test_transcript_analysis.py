@@ -91,7 +91,37 @@ def test_detect_repetitions():
     )
 
     repetitions = TextErrorsParser(transcript_repetitions).detect_repetitions()
-    assert set(repetitions) == {"Text", "texts"}
+    assert_that(
+        repetitions,
+        contains_exactly(
+            has_properties(first_index=0, second_index=3, start_ts=6, end_ts=16)
+        ),
+    )
+
+
+def test_detect_repetitions_within_window():
+    transcript_repetitions = TranscriptionVerbose(
+        duration="60",
+        language="polish",
+        text="Text again text and much later texts",
+        segments=None,
+        words=[
+            TranscriptionWord(start=0, end=1, word="Text"),
+            TranscriptionWord(start=1, end=2, word="again"),
+            TranscriptionWord(start=2, end=3, word="text"),
+            TranscriptionWord(start=3, end=4, word="and"),
+            TranscriptionWord(start=4, end=5, word="much"),
+            TranscriptionWord(start=5, end=6, word="later"),
+            TranscriptionWord(start=50, end=51, word="texts"),
+        ],
+        task="transcribe",
+    )
+
+    repetitions = TextErrorsParser(transcript_repetitions).detect_repetitions(window=10)
+    assert_that(
+        repetitions,
+        contains_exactly(has_properties(first_word="Text", second_word="text")),
+    )
 
 
 def test_count_numbers_per_sentence():
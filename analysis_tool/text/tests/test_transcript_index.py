@@ -0,0 +1,20 @@
+from hamcrest import assert_that, equal_to
+
+from analysis_tool.tests.transcripts import make_transcript
+from analysis_tool.text.transcript_index import TranscriptIndex
+
+
+def test_sentences_found_from_text_punctuation():
+    # given
+    text = "Mamy 3 wyniki. Koniec! A 2024, rok?"
+    transcript = make_transcript(text)
+
+    # when
+    index = TranscriptIndex.from_transcript(transcript)
+
+    # then
+    assert_that(index.sentence_id.tolist(), equal_to([0, 0, 0, 1, 2, 2, 2]))
+    assert_that(index.sentence_offsets.tolist(), equal_to([0, 3, 4, 7]))
+    assert_that(index.is_number.tolist(), equal_to([0, 1, 0, 0, 0, 1, 0]))
+    assert_that(index.syllables.tolist(), equal_to([2, 0, 3, 3, 1, 0, 1]))
+    assert_that(index.word_at(index.text.index("wyniki") + 2), equal_to(2))
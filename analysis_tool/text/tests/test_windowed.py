@@ -0,0 +1,89 @@
+import numpy as np
+from hamcrest import assert_that, close_to, contains_exactly, has_properties
+from openai.types.audio import TranscriptionVerbose, TranscriptionWord
+
+from analysis_tool.mistakes.mistakes import MistakeType
+from analysis_tool.tests.transcripts import make_transcript
+from analysis_tool.text.mistakes import find_windowed_mistakes
+from analysis_tool.text.transcript_index import TranscriptIndex
+from analysis_tool.text.windowed import fog_index, window_starts, window_sums
+
+
+def test_window_sums_match_counting_every_window():
+    # given
+    times = np.sort(np.random.default_rng(0).uniform(0, 100, 500))
+    values = np.arange(500)
+    starts = np.arange(0, 90, 2.5)
+
+    # when
+    sums = window_sums(times, values, starts, window=10)
+
+    # then
+    expected = [values[(times >= s) & (times < s + 10)].sum() for s in starts]
+    assert sums.tolist() == expected
+
+
+def test_fast_passage_is_localized():
+    # given two minutes at 120 words per minute with 30 seconds at 240 in the middle
+    starts = [
+        *np.arange(0, 45, 0.5),
+        *np.arange(45, 75, 0.25),
+        *np.arange(75, 120, 0.5),
+    ]
+    transcript = TranscriptionVerbose(
+        duration="120",
+        language="polish",
+        text=" ".join(["tak."] * len(starts)),
+        segments=None,
+        words=[
+            TranscriptionWord(start=start, end=start + 0.2, word="tak")
+            for start in starts
+        ],
+        task="transcribe",
+    )
+
+    # when
+    mistakes = find_windowed_mistakes(transcript, window=20, hop=5)
+
+    # then
+    assert_that(
+        mistakes,
+        contains_exactly(
+            has_properties(
+                type=MistakeType.SPEAKING_TOO_FAST,
+                start_ts=close_to(35, 0.01),
+                end_ts=close_to(85, 0.01),
+                detail="240 words/min",
+            )
+        ),
+    )
+
+
+def test_fog_index_uses_whole_sentences_overlapping_the_window():
+    # given sentences of 10 words, every other one long
+    words = ["niesamowicie" if i % 2 else "tak" for i in range(120)]
+    sentences = [" ".join(words[i : i + 10]) + "." for i in range(0, 120, 10)]
+    index = TranscriptIndex.from_transcript(
+        make_transcript(" ".join(sentences), word_step=0.5)
+    )
+    # Windows starting in the middle of a sentence
+    starts = np.array([2.5, 12.5])
+
+    # when
+    fog = fog_index(index, starts, window=20)
+
+    # then
+    assert np.allclose(fog, 0.4 * (10 + 50))
+
+
+def test_sparse_punctuation_is_not_a_difficult_text():
+    # given two minutes of short words with a single full stop
+    words = ["tak"] * 240
+    transcript = make_transcript(" ".join(words) + ".", word_step=0.5)
+    index = TranscriptIndex.from_transcript(transcript)
+
+    # when
+    fog = fog_index(index, window_starts(index, 20, 5), window=20)
+
+    # then
+    assert not fog.any()
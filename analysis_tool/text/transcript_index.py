@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from openai.types.audio import TranscriptionVerbose
+
+# Polish vowels, every one of them is a syllable
+VOWELS = frozenset("aeiouyąęó")
+SENTENCE_ENDS = frozenset(".!?")
+# How far past the previous word the next one is looked for in the transcript text
+WORD_SEARCH_AHEAD = 100
+
+
+def count_syllables(word: str) -> int:
+    return sum(1 for char in word.lower() if char in VOWELS)
+
+
+@dataclass
+class TranscriptIndex:
+    """Columns of per-word values of a transcript, built in one pass over its words.
+
+    Word level timestamps come without punctuation, so sentences are found by locating
+    the words in the transcript text.
+    """
+
+    words: list[str]
+    start: np.ndarray
+    end: np.ndarray
+    syllables: np.ndarray
+    is_number: np.ndarray  # any character of the word is a digit
+    sentence_id: np.ndarray
+    # Index of the first word of every sentence, followed by the number of words
+    sentence_offsets: np.ndarray
+    # Words joined by single spaces and where every word starts in it
+    text: str
+    char_offsets: np.ndarray
+
+    @classmethod
+    def from_transcript(cls, transcript: "TranscriptionVerbose") -> "TranscriptIndex":
+        words = [word.word.strip() for word in transcript.words or []]
+        sentence_ends = _sentence_ends(transcript.text, words)
+
+        char_offsets = np.zeros(len(words), dtype=np.int64)
+        if words:
+            char_offsets[1:] = np.cumsum([len(word) + 1 for word in words[:-1]])
+
+        # A word ending a sentence belongs to it, the next word starts a new one
+        sentence_id = np.zeros(len(words), dtype=np.int64)
+        sentence_id[1:] = np.cumsum(sentence_ends[:-1])
+        sentence_count = sentence_id[-1] + 1 if words else 0
+
+        return cls(
+            words=words,
+            start=np.array([w.start for w in transcript.words or []], dtype=float),
+            end=np.array([w.end for w in transcript.words or []], dtype=float),
+            syllables=np.array([count_syllables(w) for w in words], dtype=np.int64),
+            is_number=np.array(
+                [any(char.isdigit() for char in word) for word in words], dtype=bool
+            ),
+            sentence_id=sentence_id,
+            sentence_offsets=np.searchsorted(
+                sentence_id, np.arange(sentence_count + 1)
+            ),
+            text=" ".join(words),
+            char_offsets=char_offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def sentence_count(self) -> int:
+        return len(self.sentence_offsets) - 1
+
+    def char_span(self, first: int, end: int) -> tuple[int, int]:
+        """Where words `first` to `end` (exclusive) are in `text`"""
+        return int(self.char_offsets[first]), int(
+            self.char_offsets[end - 1] + len(self.words[end - 1])
+        )
+
+    def word_at(self, char_offset: int) -> int:
+        """Index of the word containing `char_offset` of `text`"""
+        return int(np.searchsorted(self.char_offsets, char_offset, side="right")) - 1
+
+
+def _sentence_ends(text: str, words: list[str]) -> np.ndarray:
+    """Whether sentence punctuation follows every word in `text`"""
+    positions = []
+    position = 0
+    for word in words:
+        # Bounded, so a word missing from the text doesn't scan the rest of it
+        limit = position + len(word) + WORD_SEARCH_AHEAD
+        found = text.find(word, position, limit) if word else -1
+        if found != -1:
+            position = found + len(word)
+        positions.append((found, position))
+
+    ends = np.zeros(len(words), dtype=bool)
+    next_start = len(text)
+    for i in reversed(range(len(words))):
+        found, word_end = positions[i]
+        if found == -1:
+            continue
+        ends[i] = any(char in SENTENCE_ENDS for char in text[word_end - 1 : next_start])
+        next_start = found
+    return ends
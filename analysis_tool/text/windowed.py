@@ -0,0 +1,98 @@
+import numpy as np
+
+from analysis_tool.text.transcript_index import TranscriptIndex
+
+# Words of more syllables count as long in the FOG index
+LONG_WORD_SYLLABLES = 3
+# Windows overlapping fewer sentences have no FOG index, a transcript with sparse
+# punctuation would make its few sentences look very long
+MIN_FOG_SENTENCES = 3
+# Rates of shorter talks are computed as if they took this long
+MIN_DURATION = 1.0  # seconds
+
+
+def window_starts(index: TranscriptIndex, window: float, hop: float) -> np.ndarray:
+    """Starts of windows every `hop` seconds, the last one ends with the last word"""
+    if not len(index):
+        return np.empty(0)
+
+    first, last = index.start[0], index.end[-1]
+    starts = np.arange(first, max(last - window, first) + hop / 2, hop)
+    if starts[-1] + window < last:
+        starts = np.append(starts, last - window)
+    return starts
+
+
+def window_sums(
+    times: np.ndarray, values: np.ndarray, starts: np.ndarray, window: float
+) -> np.ndarray:
+    """Sum of `values` at sorted `times` within [start, start + window) of every window"""
+    prefix = np.concatenate([[0], np.cumsum(values)])
+    first = np.searchsorted(times, starts)
+    end = np.searchsorted(times, starts + window)
+    return prefix[end] - prefix[first]
+
+
+def window_durations(
+    index: TranscriptIndex, starts: np.ndarray, window: float
+) -> np.ndarray:
+    """Window lengths, a talk shorter than the window is one shorter window"""
+    return np.maximum(np.minimum(starts + window, index.end[-1]) - starts, MIN_DURATION)
+
+
+def speech_pace(
+    index: TranscriptIndex, starts: np.ndarray, window: float
+) -> np.ndarray:
+    """Words per minute"""
+    words = window_sums(index.start, np.ones(len(index)), starts, window)
+    return 60 * words / window_durations(index, starts, window)
+
+
+def number_density(
+    index: TranscriptIndex, starts: np.ndarray, window: float
+) -> np.ndarray:
+    """Numbers said per minute"""
+    numbers = window_sums(index.start, index.is_number, starts, window)
+    return 60 * numbers / window_durations(index, starts, window)
+
+
+def fog_index(index: TranscriptIndex, starts: np.ndarray, window: float) -> np.ndarray:
+    """FOG index of every window, 0 where it overlaps less than `MIN_FOG_SENTENCES`.
+
+    Long words are counted among words said in the window, sentence length is the mean
+    length of whole sentences overlapping the window.
+    """
+    first = np.searchsorted(index.start, starts)
+    end = np.searchsorted(index.start, starts + window)
+    words = end - first
+    long_words = window_sums(
+        index.start, index.syllables > LONG_WORD_SYLLABLES, starts, window
+    )
+
+    # Empty windows get a sentence of their own, they are left out below anyway
+    first_sentence = index.sentence_id[np.minimum(first, len(index) - 1)]
+    last_sentence = index.sentence_id[np.maximum(end - 1, 0)]
+    sentences = np.maximum(last_sentence - first_sentence + 1, 1)
+    sentence_words = (
+        index.sentence_offsets[last_sentence + 1]
+        - index.sentence_offsets[first_sentence]
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fog = 0.4 * (sentence_words / sentences + 100 * long_words / words)
+    return np.where((words > 0) & (sentences >= MIN_FOG_SENTENCES), fog, 0.0)
+
+
+def intervals_above(
+    starts: np.ndarray, ends: np.ndarray, values: np.ndarray, threshold: float
+) -> list[tuple[float, float, float]]:
+    """(start, end, peak value) of runs of overlapping windows above `threshold`"""
+    intervals = []
+    for i in np.flatnonzero(values > threshold):
+        start, end = float(starts[i]), float(ends[i])
+        if intervals and start <= intervals[-1][1]:
+            previous_start, _, peak = intervals.pop()
+            intervals.append((previous_start, end, max(peak, float(values[i]))))
+        else:
+            intervals.append((start, end, float(values[i])))
+    return intervals
@@ -0,0 +1,125 @@
+from typing import Callable, Hashable
+
+import numpy as np
+
+from analysis_tool.video.feature_store import Observations
+from analysis_tool.video.frame_source import Detector
+from analysis_tool.video.video_parser import VideoParser
+
+COARSE_INTERVAL = 1.0
+# Frames held in memory at once while observing
+BATCH_SIZE = 16
+
+
+class AdaptiveSampler:
+    """Coarse-to-fine sampling for detectors looking for rare events.
+
+    The video is first scanned every `coarse_interval`. Between neighbouring coarse
+    samples with different `state` the change is bisected down to single samples of the
+    fine grid, so events still start and end with fine precision. Stretches between
+    coarse samples for which `dense` holds (e.g. hands moved, so their movement has to
+    be tracked frame to frame) are sampled fully. Events shorter than `coarse_interval`
+    that don't change the state of any coarse sample can be missed.
+
+    Detectors tracking frames are reset before every frame that doesn't follow the
+    previously observed one on the fine grid.
+    """
+
+    def __init__(
+        self,
+        video: VideoParser,
+        detector: Detector,
+        state: Callable[[object], Hashable],
+        dense: Callable[[object, object], bool] = lambda first, second: False,
+        fine_interval: float = 0.1,
+        coarse_interval: float = COARSE_INTERVAL,
+    ) -> None:
+        self.video = video
+        self.detector = detector
+        self.state = state
+        self.dense = dense
+        self.fine_indices = video.frame_indices(fine_interval)
+        self.coarse_step = max(1, round(coarse_interval / fine_interval))
+        # Position on the fine grid -> (timestamp, observation)
+        self.observed: dict[int, tuple[float, object]] = {}
+        self.last_position: int | None = None
+
+    def run(self) -> Observations:
+        if not self.fine_indices:
+            return []
+
+        last = len(self.fine_indices) - 1
+        coarse = sorted({*range(0, last, self.coarse_step), last})
+        self._observe(coarse)
+
+        gaps = [(a, b) for a, b in zip(coarse[:-1], coarse[1:]) if b - a > 1]
+        dense_gaps = [gap for gap in gaps if self._is_dense(*gap)]
+        self._observe([p for a, b in dense_gaps for p in range(a + 1, b)])
+
+        changing = [
+            gap for gap in gaps if gap not in dense_gaps and self._changes(*gap)
+        ]
+        while changing:
+            # Every round bisects all changing gaps in a single decoding pass
+            middles = [(a + b) // 2 for a, b in changing]
+            self._observe(middles)
+
+            changing = [
+                gap
+                for (a, b), middle in zip(changing, middles)
+                for gap in ((a, middle), (middle, b))
+                if gap[1] - gap[0] > 1 and self._changes(*gap)
+            ]
+
+        return [self.observed[position] for position in sorted(self.observed)]
+
+    def _observe(self, positions: list[int]) -> None:
+        positions = sorted(set(positions) - self.observed.keys())
+        if not positions:
+            return
+
+        indices = [self.fine_indices[position] for position in positions]
+        batch: list[tuple[int, float, np.ndarray]] = []
+        for position, (_, current_time, frame) in zip(
+            positions, self.video.read_frames(indices)
+        ):
+            if self.detector.tracks_frames and (
+                self.last_position is None or position != self.last_position + 1
+            ):
+                # Whatever the detector tracks is gone by now, it must not carry over
+                if batch:
+                    self._observe_batch(batch)
+                    batch = []
+                self.detector.reset()
+            self.last_position = position
+
+            batch.append((position, current_time, frame))
+            if len(batch) >= BATCH_SIZE:
+                self._observe_batch(batch)
+                batch = []
+
+        if batch:
+            self._observe_batch(batch)
+
+    def _observe_batch(self, batch: list[tuple[int, float, np.ndarray]]) -> None:
+        observations = self.detector.observe_batch([frame for _, _, frame in batch])
+        for (position, current_time, _), observation in zip(batch, observations):
+            self.observed[position] = (current_time, observation)
+
+    def _state(self, position: int) -> Hashable:
+        _, observation = self.observed[position]
+        return self.state(observation)
+
+    def _changes(self, a: int, b: int) -> bool:
+        return (
+            a in self.observed
+            and b in self.observed
+            and self._state(a) != self._state(b)
+        )
+
+    def _is_dense(self, a: int, b: int) -> bool:
+        return (
+            a in self.observed
+            and b in self.observed
+            and self.dense(self.observed[a][1], self.observed[b][1])
+        )
@@ -0,0 +1,153 @@
+import cv2
+import numpy as np
+
+from analysis_tool.model_registry import get_emotion_detector, get_hands, get_yolo
+from analysis_tool.video.faces import FaceDetector
+from analysis_tool.video.frame_source import Detector
+from analysis_tool.video.trackers import (
+    ExpressionsTracker,
+    MovingTracker,
+    SecondPersonTracker,
+)
+
+PERSON_CLASS_ID = 0
+# People are kept down to this confidence, so the decision threshold can be retuned
+PERSON_CANDIDATE_CONFIDENCE = 0.25
+
+
+class ExpressionsDetector(Detector):
+    tracks_frames = True
+
+    def __init__(self, faces: FaceDetector | None = None) -> None:
+        super().__init__(ExpressionsTracker())
+        self.faces = faces or FaceDetector()
+        self.detector = get_emotion_detector()
+
+    def reset(self) -> None:
+        self.faces.reset()
+
+    def observe(self, frame: np.ndarray) -> dict[str, float] | None:
+        faces = self.faces.detect(frame)
+        if not len(faces):
+            return None
+
+        # With face rectangles given FER only classifies the face crops
+        emotions = self.detector.detect_emotions(frame, face_rectangles=faces.tolist())
+        return emotions[0]["emotions"] if emotions else None
+
+
+def decode_person_boxes(
+    outs: list[np.ndarray],
+    batch_size: int,
+    frame_shape: tuple[int, ...],
+    confidence_threshold: float = PERSON_CANDIDATE_CONFIDENCE,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Turn raw YOLO outputs of a batch into (boxes, confidences) of people for every frame"""
+    # Single image outputs are (rows, 85), batched ones (batch, rows, 85)
+    detections = np.concatenate(
+        [out.reshape(batch_size, -1, out.shape[-1]) for out in outs], axis=1
+    )
+    scores = detections[..., 5:]
+    class_ids = scores.argmax(axis=2)
+    confidences = scores.max(axis=2)
+    is_person = (class_ids == PERSON_CLASS_ID) & (confidences > confidence_threshold)
+
+    height, width = frame_shape[:2]
+    center_x = np.trunc(detections[..., 0] * width)
+    center_y = np.trunc(detections[..., 1] * height)
+    w = np.trunc(detections[..., 2] * width)
+    h = np.trunc(detections[..., 3] * height)
+
+    # Get bounding box coordinates
+    x = np.trunc(center_x - w / 2)
+    y = np.trunc(center_y - h / 2)
+    boxes = np.stack([x, y, w, h], axis=2).astype(int)
+
+    return [
+        (boxes[i][is_person[i]], confidences[i][is_person[i]].astype(float))
+        for i in range(batch_size)
+    ]
+
+
+class OtherPeopleDetector(Detector):
+    def __init__(self, batch_size: int = 8) -> None:
+        super().__init__(SecondPersonTracker())
+        self.net, self.output_layers = get_yolo()
+
+        # Frames are buffered and sent through the network in one forward pass per batch
+        self.batch_size = batch_size
+        self.frames: list[np.ndarray] = []
+        self.timestamps: list[float] = []
+
+    def process(self, frame: np.ndarray, current_time: float) -> None:
+        self.frames.append(frame)
+        self.timestamps.append(current_time)
+
+        if len(self.frames) >= self.batch_size:
+            self._process_batch()
+
+    def finish(self) -> None:
+        if self.frames:
+            self._process_batch()
+
+    def observe(self, frame: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return self.observe_batch([frame])[0]
+
+    def observe_batch(
+        self, frames: list[np.ndarray]
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        # Prepare the frames for YOLO
+        blob = cv2.dnn.blobFromImages(
+            frames, 0.00392, (416, 416), (0, 0, 0), True, crop=False
+        )
+        self.net.setInput(blob)
+        outs = self.net.forward(self.output_layers)
+
+        return decode_person_boxes(outs, len(frames), frames[0].shape)
+
+    def _process_batch(self) -> None:
+        people = self.observe_batch(self.frames)
+        for current_time, observation in zip(self.timestamps, people):
+            self.record(current_time, observation)
+
+        self.frames = []
+        self.timestamps = []
+
+
+class TurningAwayDetector(Detector):
+    tracks_frames = True
+
+    def __init__(self, faces: FaceDetector | None = None) -> None:
+        super().__init__(MovingTracker())
+        self.faces = faces or FaceDetector()
+
+        # Setup for hand gesture detection, the shared model must not track hands of
+        # previously analyzed video
+        self.hands = get_hands()
+        self.hands.reset()
+
+    def reset(self) -> None:
+        self.faces.reset()
+        # MediaPipe would look for the hands where they were on the previous frame
+        self.hands.reset()
+
+    def observe(self, frame: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        # Detect faces (Turning Away Detection)
+        faces = self.faces.detect(frame)
+
+        # Hand Gesture Detection using MediaPipe
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        hand_results = self.hands.process(rgb_frame)
+
+        hand_positions = None
+        if hand_results.multi_hand_landmarks:
+            # Store the (x, y) coordinates of each hand landmark
+            hand_positions = np.array(
+                [
+                    (landmark.x, landmark.y)
+                    for hand_landmarks in hand_results.multi_hand_landmarks
+                    for landmark in hand_landmarks.landmark
+                ]
+            )
+
+        return faces, hand_positions
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+from analysis_tool.model_registry import get_face_cascade
+
+# Faces of a speaker are big, they are still found on a frame of this width
+FACE_DETECTION_WIDTH = 640
+# How much the previous face box is enlarged on every side to search for the face
+ROI_MARGIN = 0.5
+
+
+class FaceDetector:
+    """Single face detection stage shared by turning away and expression analysis.
+
+    Faces are detected on a downscaled grey frame, first only around the previous face
+    box and on the whole frame when the face isn't there anymore. Results are kept for
+    the last frame, so every detector sampling the same frame reuses them.
+    """
+
+    def __init__(self) -> None:
+        self.face_cascade = get_face_cascade()
+        self.previous_face: np.ndarray | None = None  # In downscaled coordinates
+        self.last_frame: np.ndarray | None = None
+        self.last_faces = np.empty((0, 4), dtype=int)
+
+    def reset(self) -> None:
+        """Search the whole next frame, e.g. when it doesn't follow the last one"""
+        self.previous_face = None
+        self.last_frame = None
+        self.last_faces = np.empty((0, 4), dtype=int)
+
+    def detect(self, frame: np.ndarray) -> np.ndarray:
+        """Face boxes (x, y, w, h) in the coordinates of the original frame"""
+        if frame is self.last_frame:
+            return self.last_faces
+
+        scale = min(1.0, FACE_DETECTION_WIDTH / frame.shape[1])
+        small_frame = cv2.resize(frame, None, fx=scale, fy=scale)
+        gray_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY)
+
+        faces = self._detect_around_previous_face(gray_frame)
+        if not len(faces):
+            faces = self._detect(gray_frame)
+
+        self.previous_face = faces[0] if len(faces) else None
+        self.last_frame = frame
+        self.last_faces = np.round(faces / scale).astype(int)
+        return self.last_faces
+
+    def _detect(self, gray_frame: np.ndarray) -> np.ndarray:
+        faces = self.face_cascade.detectMultiScale(
+            gray_frame, scaleFactor=1.3, minNeighbors=5
+        )
+        return np.array(faces).reshape(-1, 4)
+
+    def _detect_around_previous_face(self, gray_frame: np.ndarray) -> np.ndarray:
+        if self.previous_face is None:
+            return np.empty((0, 4), dtype=int)
+
+        x, y, w, h = self.previous_face
+        x1 = max(0, int(x - w * ROI_MARGIN))
+        y1 = max(0, int(y - h * ROI_MARGIN))
+        x2 = min(gray_frame.shape[1], int(x + w * (1 + ROI_MARGIN)))
+        y2 = min(gray_frame.shape[0], int(y + h * (1 + ROI_MARGIN)))
+
+        faces = self._detect(gray_frame[y1:y2, x1:x2])
+        return faces + np.array([x1, y1, 0, 0])
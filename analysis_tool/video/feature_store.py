@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from analysis_tool.params import CACHE_PATH
+
+FEATURE_STORE_PATH = os.path.join(CACHE_PATH, "features")
+# Bump when columns of the stored observations change
+FEATURES_SCHEMA_VERSION = 1
+
+Observations = list[tuple[float, object]]
+
+
+def features_key(file_path: str, config: dict) -> str:
+    """Hash of the video identity and of everything else the observations depend on.
+
+    The video is identified by its path, size and modification time, hashing gigabytes
+    of content on every run would cost more than replaying the features saves.
+    `config` holds sampling intervals, frame size, detector settings and model versions.
+    """
+    stat = os.stat(file_path)
+    identity = {
+        "schema": FEATURES_SCHEMA_VERSION,
+        "path": os.path.abspath(file_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "config": config,
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+
+def features_path(
+    file_path: str, config: dict, store_path: str = FEATURE_STORE_PATH
+) -> str:
+    return os.path.join(store_path, f"{features_key(file_path, config)}.npz")
+
+
+def _pack_ragged(arrays: list[np.ndarray], width: int, dtype) -> dict[str, np.ndarray]:
+    """Variable length per sample arrays as one flat array and offsets of every sample"""
+    offsets = np.cumsum([0, *(len(array) for array in arrays)])
+    values = np.concatenate(
+        [
+            np.empty((0, width), dtype=dtype),
+            *(np.asarray(a).reshape(-1, width) for a in arrays),
+        ]
+    ).astype(dtype)
+    return {"values": values, "offsets": offsets}
+
+
+def _unpack_ragged(values: np.ndarray, offsets: np.ndarray) -> list[np.ndarray]:
+    return [values[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def _encode(name: str, observations: Observations) -> dict[str, np.ndarray]:
+    columns = {"timestamps": np.array([ts for ts, _ in observations], dtype=float)}
+    values = [observation for _, observation in observations]
+
+    if name == "other_people":
+        boxes = _pack_ragged([boxes for boxes, _ in values], 4, np.int32)
+        scores = _pack_ragged([scores for _, scores in values], 1, np.float32)
+        columns |= {
+            "boxes": boxes["values"],
+            "scores": scores["values"][:, 0],
+            "offsets": boxes["offsets"],
+        }
+    elif name == "turning_away":
+        faces = _pack_ragged([faces for faces, _ in values], 4, np.int32)
+        # No hands and zero landmarks are the same thing
+        hands = _pack_ragged(
+            [np.empty((0, 2)) if hands is None else hands for _, hands in values],
+            2,
+            np.float32,
+        )
+        columns |= {
+            "faces": faces["values"],
+            "face_offsets": faces["offsets"],
+            "hands": hands["values"],
+            "hand_offsets": hands["offsets"],
+        }
+    elif name == "expressions":
+        emotion_names = next((list(e) for e in values if e), [])
+        # Samples without a face are rows of NaN
+        columns |= {
+            "emotion_names": np.array(emotion_names, dtype=str),
+            "emotions": np.array(
+                [
+                    (
+                        [e[n] for n in emotion_names]
+                        if e
+                        else [np.nan] * len(emotion_names)
+                    )
+                    for e in values
+                ],
+                dtype=np.float32,
+            ).reshape(len(values), len(emotion_names)),
+        }
+    elif name == "subtitles":
+        columns["texts"] = np.array(values, dtype=str)
+
+    return {f"{name}/{column}": array for column, array in columns.items()}
+
+
+def _decode(name: str, columns: dict[str, np.ndarray]) -> Observations:
+    timestamps = columns["timestamps"].tolist()
+
+    if name == "other_people":
+        boxes = _unpack_ragged(columns["boxes"].astype(int), columns["offsets"])
+        scores = _unpack_ragged(columns["scores"].astype(float), columns["offsets"])
+        values = list(zip(boxes, scores))
+    elif name == "turning_away":
+        faces = _unpack_ragged(columns["faces"].astype(int), columns["face_offsets"])
+        hands = _unpack_ragged(columns["hands"].astype(float), columns["hand_offsets"])
+        values = [
+            (sample_faces, sample_hands if len(sample_hands) else None)
+            for sample_faces, sample_hands in zip(faces, hands)
+        ]
+    elif name == "expressions":
+        emotion_names = columns["emotion_names"].tolist()
+        values = [
+            (
+                None
+                if not emotion_names or np.isnan(row).any()
+                else dict(zip(emotion_names, row.tolist()))
+            )
+            for row in columns["emotions"]
+        ]
+    elif name == "subtitles":
+        values = columns["texts"].tolist()
+    else:
+        raise ValueError(f"Unknown detector: {name}")
+
+    return list(zip(timestamps, values))
+
+
+def save_features(path: str, observations: dict[str, Observations]) -> None:
+    """Store per-sample observations of every detector as columns of one `.npz` file"""
+    arrays = {}
+    for name, detector_observations in observations.items():
+        arrays |= _encode(name, detector_observations)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first, so readers never see half written features
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_features(path: str) -> dict[str, Observations] | None:
+    if not os.path.exists(path):
+        return None
+
+    columns: dict[str, dict[str, np.ndarray]] = {}
+    with np.load(path, allow_pickle=False) as npz:
+        for key in npz.files:
+            name, column = key.split("/")
+            columns.setdefault(name, {})[column] = npz[key]
+
+    return {name: _decode(name, name_columns) for name, name_columns in columns.items()}
@@ -0,0 +1,93 @@
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from analysis_tool.mistakes.models import Mistake
+from analysis_tool.video.trackers import Tracker
+
+if TYPE_CHECKING:
+    from analysis_tool.video.video_parser import VideoParser
+
+
+class FrameConsumer(ABC):
+    @abstractmethod
+    def process(self, frame: np.ndarray, current_time: float) -> None: ...
+
+    def finish(self) -> None:
+        """Called once after the last frame, consumers buffering frames flush them here"""
+
+
+class Detector(FrameConsumer):
+    """Runs a model on sampled frames and feeds the observations to its tracker"""
+
+    # Observations depend on the previous frame (e.g. searching around the last face or
+    # tracking hands), `reset` must be called before a frame not following the last one
+    tracks_frames = False
+
+    def __init__(self, tracker: Tracker) -> None:
+        self.tracker = tracker
+        # Observations are only kept when they are replayed later (shards, feature store),
+        # otherwise memory would grow with the length of the video
+        self.keep_observations = False
+        self.observations: list[tuple[float, object]] = []
+
+    @property
+    def mistakes(self) -> list[Mistake]:
+        return self.tracker.mistakes
+
+    def process(self, frame: np.ndarray, current_time: float) -> None:
+        self.record(current_time, self.observe(frame))
+
+    @abstractmethod
+    def observe(self, frame: np.ndarray): ...
+
+    def reset(self) -> None:
+        """Forget what was seen on the previous frame"""
+
+    def observe_batch(self, frames: list[np.ndarray]) -> list:
+        return [self.observe(frame) for frame in frames]
+
+    def record(self, current_time: float, observation) -> None:
+        if self.keep_observations:
+            self.observations.append((current_time, observation))
+        self.tracker.update(current_time, observation)
+
+
+class FrameSource:
+    """Decodes video once and fans sampled frames out to every registered consumer.
+
+    `start` and `end` (in seconds) limit decoding to a part of the video, samples keep
+    the positions they have in the whole video so parts can be analyzed separately.
+    """
+
+    def __init__(
+        self, video: "VideoParser", start: float = 0, end: float | None = None
+    ) -> None:
+        self.video = video
+        self.start_frame = round(start * video.fps)
+        self.end_frame = video.frame_count if end is None else round(end * video.fps)
+        self.consumers: list[tuple[FrameConsumer, set[int]]] = []
+        self.intervals: list[float] = []
+
+    def register(self, consumer: FrameConsumer, interval: float) -> None:
+        """Feed `consumer` with the frame closest to every `interval` seconds"""
+        indices = {
+            index
+            for index in self.video.frame_indices(interval)
+            if self.start_frame <= index < self.end_frame
+        }
+        self.consumers.append((consumer, indices))
+        self.intervals.append(interval)
+
+    def run(self) -> None:
+        indices = sorted(set().union(*(indices for _, indices in self.consumers)))
+
+        frames = self.video.read_grid_frames(indices, self.intervals)
+        for index, current_time, frame in frames:
+            for consumer, consumer_indices in self.consumers:
+                if index in consumer_indices:
+                    consumer.process(frame, current_time)
+
+        for consumer, _ in self.consumers:
+            consumer.finish()
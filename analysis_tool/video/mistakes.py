@@ -1,277 +1,231 @@
-import os
-from math import sqrt
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-import cv2
-import mediapipe as mp
 import numpy as np
-from fer import FER
 
-from analysis_tool.mistakes.mistakes import MistakeType, MistakeCategory
 from analysis_tool.mistakes.models import Mistake
-from analysis_tool.params import PROJECT_ROOT
+from analysis_tool.model_registry import model_versions, warm_up
+from analysis_tool.video.adaptive import AdaptiveSampler
+from analysis_tool.video.detectors import (
+    PERSON_CANDIDATE_CONFIDENCE,
+    ExpressionsDetector,
+    OtherPeopleDetector,
+    TurningAwayDetector,
+)
+from analysis_tool.video.faces import FACE_DETECTION_WIDTH, FaceDetector
+from analysis_tool.video.feature_store import (
+    Observations,
+    features_path,
+    load_features,
+    save_features,
+)
+from analysis_tool.video.frame_source import Detector, FrameSource
+from analysis_tool.video.subtitles import SubtitleReader
+from analysis_tool.video.trackers import (
+    DetectionThresholds,
+    ExpressionsTracker,
+    MovingTracker,
+    SecondPersonTracker,
+    SubtitleTracker,
+    Tracker,
+    hand_movement_lengths,
+)
 from analysis_tool.video.video_parser import VideoParser
 
+# Process people, faces and hands every 100ms
+DETECTION_INTERVAL = 0.1
+# Detectors whose observations are stored, see `_create_detectors`
+DETECTOR_NAMES = ("other_people", "turning_away", "expressions", "subtitles")
+
+
+def get_video_mistakes(
+    video: VideoParser,
+    workers: int = 1,
+    thresholds: DetectionThresholds | None = None,
+    use_feature_store: bool = True,
+) -> list[Mistake]:
+    """Run all video detectors on a single decode pass.
+
+    With `workers` > 1 the video is split into time shards analyzed in separate processes.
+    Model outputs are kept in the feature store, so analyzing the same video again (e.g.
+    with different `thresholds`) only replays the decision logic.
+    """
+    path = (
+        features_path(video.file_path, feature_config(video))
+        if use_feature_store
+        else None
+    )
+    observations = load_features(path) if path else None
+
+    if observations is None:
+        observations = _extract_observations(video, workers)
+        if path:
+            save_features(path, observations)
+
+    trackers = replay_observations(observations, thresholds)
+
+    # Subtitles are read from the same decoded frames, so the OCR pass is free of decoding
+    if video.subtitles is None:
+        video.subtitles = trackers["subtitles"].text
+        video.subtitle_cues = trackers["subtitles"].cues
+
+    return [
+        *trackers["other_people"].mistakes,
+        *trackers["turning_away"].mistakes,
+        *trackers["expressions"].mistakes,
+    ]
+
+
+def feature_config(video: VideoParser) -> dict:
+    """Everything besides the video itself that changes the stored observations"""
+    return {
+        "detectors": list(DETECTOR_NAMES),
+        "detection_interval": DETECTION_INTERVAL,
+        "subtitle_interval": video.SUBTITLE_INTERVAL,
+        "frame_size": list(video.frame_size),
+        "subtitle_region": list(video.subtitle_region),
+        "person_candidate_confidence": PERSON_CANDIDATE_CONFIDENCE,
+        "face_detection_width": FACE_DETECTION_WIDTH,
+        "models": model_versions(),
+    }
+
+
+def replay_observations(
+    observations: dict[str, Observations],
+    thresholds: DetectionThresholds | None = None,
+) -> dict[str, Tracker]:
+    """Run decision logic of every detector on stored per-sample model outputs"""
+    trackers: dict[str, Tracker] = {
+        "other_people": SecondPersonTracker(thresholds),
+        "turning_away": MovingTracker(thresholds),
+        "expressions": ExpressionsTracker(thresholds),
+        "subtitles": SubtitleTracker(thresholds),
+    }
+
+    for name, tracker in trackers.items():
+        tracker.replay(observations[name])
+
+    return trackers
+
+
+def _create_detectors(
+    video: VideoParser, start: float = 0, end: float | None = None
+) -> tuple[FrameSource, dict[str, Detector]]:
+    # Turning away and expressions sample the same frames and share detected faces
+    faces = FaceDetector()
+    detectors: dict[str, Detector] = {
+        "other_people": OtherPeopleDetector(),
+        "turning_away": TurningAwayDetector(faces),
+        "expressions": ExpressionsDetector(faces),
+        "subtitles": SubtitleReader(video.subtitle_region),
+    }
+
+    source = FrameSource(video, start, end)
+    for name, detector in detectors.items():
+        interval = (
+            video.SUBTITLE_INTERVAL if name == "subtitles" else DETECTION_INTERVAL
+        )
+        source.register(detector, interval)
 
-def get_video_mistakes(video: VideoParser) -> list[Mistake]:
-    other_people_mistakes = recognize_other_people(video)
-    turning_away_mistakes = detect_turning_away_and_gestures(video)
-    expressions_mistakes = analyze_expressions(video)
-    return [*other_people_mistakes, *turning_away_mistakes, *expressions_mistakes]
+    return source, detectors
 
 
-def analyze_expressions(video: VideoParser) -> list[Mistake]:
-    detector = FER()
-    cap = cv2.VideoCapture(video.file_path)
-    mistakes = []
-    frame_count = 0
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Process people every 100ms
-        if frame_count % (video.fps * 0.1) != 0:
-            frame_count += 1
-            continue
-
-        frame_count += 1
-        emotions = detector.detect_emotions(frame)
-        current_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0  # Timestamp in seconds
-
-        if not emotions:
-            continue
-
-        strongest_emotion = None
-        max_confidence = 0
-        for emotion_name, confidence in emotions[0]["emotions"].items():
-            if (
-                confidence > max_confidence
-                and confidence > 0.9
-                and emotion_name != "neutral"
-            ):
-                strongest_emotion = emotion_name
-                max_confidence = confidence
-
-        if strongest_emotion:
-            mistakes.append(
-                Mistake(
-                    type=MistakeType.FACIAL_EXPRESSIONS,
-                    category=MistakeCategory.VIDEO,
-                    confidence=max_confidence,
-                    start_ts=current_time,
-                    end_ts=current_time + 1,
-                    detail=strongest_emotion,
-                )
-            )
-
-    cap.release()
-    return mistakes
-
-
-def recognize_other_people(video: VideoParser) -> list[Mistake]:
-    yolo_config = os.path.join(PROJECT_ROOT, "analysis_tool", "video", "yolo_config")
-    net = cv2.dnn.readNet(
-        os.path.join(yolo_config, "yolov4-tiny.weights"),
-        os.path.join(yolo_config, "yolov4-tiny.cfg"),
-    )
+def _analyze_shard(
+    file_name: str, start: float = 0, end: float | None = None
+) -> dict[str, Observations]:
+    video = VideoParser(file_name)
+    source, detectors = _create_detectors(video, start, end)
+    # Trackers replay the observations after all shards are done
+    for detector in detectors.values():
+        detector.keep_observations = True
+    source.run()
+    return {name: detector.observations for name, detector in detectors.items()}
+
 
-    layer_names = net.getLayerNames()
-    output_layers = [layer_names[i - 1] for i in net.getUnconnectedOutLayers()]
+def _extract_observations(video: VideoParser, workers: int) -> dict[str, Observations]:
+    if workers <= 1:
+        return _analyze_shard(video.file_name)
 
-    cap = cv2.VideoCapture(video.file_path)
-    frame_count = 0
+    shard_length = video.duration / workers
+    starts = [i * shard_length for i in range(workers)]
+    ends = [*starts[1:], None]
 
-    mistakes = []
-    previous_boxes = []
-    other_person_detected = False
+    # Models are loaded once per worker process, before its first shard arrives
+    with ProcessPoolExecutor(workers, initializer=warm_up) as executor:
+        shards = list(
+            executor.map(_analyze_shard, repeat(video.file_name), starts, ends)
+        )
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # Workers only run the models, trackers replay their observations in time order.
+    # That way state crossing shard boundaries (open second person or turning away
+    # intervals, hand positions from the previous frame) is stitched exactly as in a
+    # single pass.
+    return {
+        name: [observation for shard in shards for observation in shard[name]]
+        for name in shards[0]
+    }
 
-        # Process people every 100ms
-        if frame_count % (video.fps * 0.1) != 0:
-            frame_count += 1
-            continue
 
-        frame_count += 1
-        current_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0  # Convert to seconds
+def _run_detector(video: VideoParser, detector: Detector) -> None:
+    source = FrameSource(video)
+    source.register(detector, DETECTION_INTERVAL)
+    source.run()
 
-        # Prepare the frame for YOLO
-        blob = cv2.dnn.blobFromImage(
-            frame, 0.00392, (416, 416), (0, 0, 0), True, crop=False
-        )
-        net.setInput(blob)
-        outs = net.forward(output_layers)
-
-        boxes = []
-        confidences = []
-        people_count = 0
-
-        for out in outs:
-            for detection in out:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-
-                # Class ID 0 is for person
-                if class_id == 0 and confidence > 0.8:
-                    center_x = int(detection[0] * frame.shape[1])
-                    center_y = int(detection[1] * frame.shape[0])
-                    w = int(detection[2] * frame.shape[1])
-                    h = int(detection[3] * frame.shape[0])
-
-                    # Get bounding box coordinates
-                    x = int(center_x - w / 2)
-                    y = int(center_y - h / 2)
-
-                    boxes.append([x, y, w, h])
-                    confidences.append(float(confidence))
-                    people_count += 1
-
-        # Apply Non-Maximum Suppression
-        indices = cv2.dnn.NMSBoxes(boxes, confidences, 0.8, 0.4)
-
-        # Update people_count based on NMS results
-        people_count = len(indices)
-
-        # When second person enters the frame
-        if people_count > 1 and not other_person_detected:
-            other_person_detected = True
-            average_confidence = np.mean([confidences[i] for i in indices.flatten()])
-            mistakes.append(
-                Mistake(
-                    type=MistakeType.SECOND_PLAN_PERSON,
-                    category=MistakeCategory.VIDEO,
-                    start_ts=current_time,
-                    confidence=average_confidence,
-                )
-            )
-
-        # When second person leaves the frame
-        if people_count == 1 and other_person_detected:
-            other_person_detected = False
-            average_confidence = np.mean([confidences[i] for i in indices.flatten()])
-            mistakes[-1].confidence = (mistakes[-1].confidence + average_confidence) / 2
-            mistakes[-1].end_ts = current_time
-
-    cap.release()
-    return mistakes
-
-
-def detect_turning_away_and_gestures(video: VideoParser) -> list[Mistake]:
-    face_cascade = cv2.CascadeClassifier(
-        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-    )
 
-    # Setup for hand gesture detection
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(max_num_hands=2, min_detection_confidence=0.7)
-
-    cap = cv2.VideoCapture(video.file_path)
-    mistakes: list[Mistake] = []
-    turning_away = False
-    previous_hand_positions = None
-    detection_started = False
-    frame_count = 0
-    primary_face_rect = None  # Track the primary face rectangle
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Process every 100ms
-        if frame_count % (video.fps * 0.1) != 0:
-            frame_count += 1
-            continue
-
-        frame_count += 1
-
-        # Detect faces (Turning Away Detection)
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(
-            gray_frame, scaleFactor=1.3, minNeighbors=5
-        )
-        current_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0  # Timestamp in seconds
-
-        # Turning Away Logic
-        if len(faces) > 0:
-            # If this is the first detected face, save its rectangle
-            if primary_face_rect is None:
-                primary_face_rect = faces[0]  # Keep the first detected face as primary
-
-            # Check if the primary face is still present
-            found_primary_face = False
-            for x, y, w, h in faces:
-                # Compare the coordinates of the primary face with detected faces
-                if np.array_equal((x, y, w, h), primary_face_rect):
-                    found_primary_face = True
-                    detection_started = True
-                    if turning_away:
-                        turning_away = False
-                        mistakes[-1].end_ts = (
-                            current_time  # Set end timestamp for turning away
-                        )
-                    break
-
-            # If the primary face is not found anymore
-            if not found_primary_face:
-                primary_face_rect = None
-
-        else:
-            if not turning_away and detection_started:
-                turning_away = True
-                if not mistakes or current_time > mistakes[-1].end_ts:
-                    mistakes.append(
-                        Mistake(
-                            type=MistakeType.MOVING,
-                            category=MistakeCategory.VIDEO,
-                            confidence=1,
-                            start_ts=current_time,
-                            end_ts=current_time + 1,
-                        )
-                    )
-
-        # Hand Gesture Detection using MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        hand_results = hands.process(rgb_frame)
-
-        current_hand_positions = []
-
-        if hand_results.multi_hand_landmarks:
-            for hand_landmarks in hand_results.multi_hand_landmarks:
-                for landmark in hand_landmarks.landmark:
-                    # Store the (x, y) coordinates of each hand landmark
-                    current_hand_positions.append((landmark.x, landmark.y))
-
-            # Check if hands have moved
-            if previous_hand_positions is not None:
-                for prev_pos, curr_pos in zip(
-                    previous_hand_positions, current_hand_positions
-                ):
-                    movement_length = sqrt(
-                        (curr_pos[0] - prev_pos[0]) ** 2
-                        + (curr_pos[1] - prev_pos[1]) ** 2
-                    )
-                    if movement_length > 0.05 and detection_started:
-                        if not mistakes or current_time > mistakes[-1].end_ts:
-                            mistakes.append(
-                                Mistake(
-                                    type=MistakeType.MOVING,
-                                    category=MistakeCategory.VIDEO,
-                                    confidence=min(movement_length / 0.1, 1),
-                                    start_ts=current_time,
-                                    end_ts=current_time + 1,
-                                )
-                            )
-                        break
-
-            previous_hand_positions = current_hand_positions
-        else:
-            previous_hand_positions = None  # Reset if no hands detected
-
-    cap.release()
-    return mistakes
+def analyze_expressions(video: VideoParser) -> list[Mistake]:
+    detector = ExpressionsDetector()
+    _run_detector(video, detector)
+    return detector.mistakes
+
+
+def recognize_other_people(video: VideoParser, adaptive: bool = False) -> list[Mistake]:
+    """With `adaptive` the video is scanned coarsely and refined only where the number
+    of people changes, see `AdaptiveSampler`."""
+    detector = OtherPeopleDetector()
+    if not adaptive:
+        _run_detector(video, detector)
+        return detector.mistakes
+
+    tracker = SecondPersonTracker()
+    observations = AdaptiveSampler(
+        video,
+        detector,
+        state=lambda people: len(tracker.people_confidences(people)) > 1,
+        fine_interval=DETECTION_INTERVAL,
+    ).run()
+    return tracker.replay(observations)
+
+
+def detect_turning_away_and_gestures(
+    video: VideoParser, adaptive: bool = False
+) -> list[Mistake]:
+    """With `adaptive` the video is scanned coarsely and refined only where the face
+    appears or disappears. Where hands appear, disappear or move between coarse samples
+    it is sampled densely, because gestures are detected from movement between
+    consecutive samples. Hands held still are not resampled."""
+    detector = TurningAwayDetector()
+    if not adaptive:
+        _run_detector(video, detector)
+        return detector.mistakes
+
+    observations = AdaptiveSampler(
+        video,
+        detector,
+        state=lambda faces_and_hands: len(faces_and_hands[0]) > 0,
+        dense=_hands_moved,
+        fine_interval=DETECTION_INTERVAL,
+    ).run()
+    return MovingTracker().replay(observations)
+
+
+def _hands_moved(
+    first: tuple[np.ndarray, np.ndarray | None],
+    second: tuple[np.ndarray, np.ndarray | None],
+) -> bool:
+    _, first_hands = first
+    _, second_hands = second
+    if first_hands is None or second_hands is None:
+        return first_hands is not second_hands
+
+    movement_lengths = hand_movement_lengths(first_hands, second_hands)
+    return bool((movement_lengths > DetectionThresholds().hand_movement).any())
@@ -0,0 +1,201 @@
+import io
+import queue
+import re
+import shutil
+import subprocess
+from collections import deque
+from functools import cache
+from threading import Thread
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+PIXEL_FORMAT_CHANNELS = {"bgr24": 3, "rgb24": 3, "gray": 1}
+# Consumers may hold on to this many frames (e.g. to batch them) before they get overwritten
+FRAME_BUFFERS = 32
+# `-fps_mode` replaced `-vsync` in this version
+FPS_MODE_VERSION = (5, 1)
+# `showinfo` filter reports its time base first and then timestamps of every frame
+SHOWINFO_TIME_BASE = re.compile(rb"config in time_base: (\d+)/(\d+)")
+SHOWINFO_PTS = re.compile(rb"\] n: *\d+ pts: *(-?\d+)")
+# Last lines of ffmpeg output kept for the error message
+ERROR_LINES = 20
+
+
+class VariableFrameRateError(Exception):
+    """Frames aren't at `index / fps`, so they can't be picked by their index"""
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+@cache
+def ffmpeg_version() -> tuple[int, int] | None:
+    """Major and minor version of ffmpeg, `None` for development builds"""
+    output = subprocess.run(
+        ["ffmpeg", "-version"], capture_output=True, check=True
+    ).stdout
+    match = re.match(rb"ffmpeg version n?(\d+)\.(\d+)", output)
+    return (int(match[1]), int(match[2])) if match else None
+
+
+def passthrough_options(version: tuple[int, int] | None) -> list[str]:
+    """Options sending frames as they are, without duplicating them to constant rate"""
+    if version is not None and version < FPS_MODE_VERSION:
+        return ["-vsync", "passthrough"]
+    return ["-fps_mode", "passthrough"]
+
+
+def grid_select(steps: list[float], first_frame: int = 0) -> str:
+    """ffmpeg `select` expression picking frames round(k * step) for any k, of any step.
+
+    Frames are numbered from `first_frame`, the first frame left after seeking. Rounding
+    is half up, the same as in `VideoParser.frame_indices`.
+    """
+    if any(step <= 1 for step in steps):
+        return "1"  # Every frame is sampled
+
+    index = f"(n+{first_frame})"
+    grids = [
+        f"eq({index},floor(floor({index}/{step!r}+0.5)*{step!r}+0.5))" for step in steps
+    ]
+    return "+".join(grids)
+
+
+def _drain_stderr(pipe: BinaryIO, timestamps: queue.Queue, lines: deque[bytes]) -> None:
+    """Read ffmpeg output as it comes, so ffmpeg never blocks on a full pipe"""
+    time_base = (0, 1)
+    # Pipes of the process are unbuffered, lines would be read byte by byte
+    for line in io.BufferedReader(pipe):
+        if match := SHOWINFO_PTS.search(line):
+            # Exact, the printed `pts_time` is rounded to microseconds
+            timestamps.put(int(match[1]) * time_base[0] / time_base[1])
+        elif match := SHOWINFO_TIME_BASE.search(line):
+            time_base = (int(match[1]), int(match[2]))
+        elif b"Parsed_showinfo" not in line:
+            lines.append(line)
+
+    pipe.close()
+    timestamps.put(None)  # No more frames
+
+
+def _read_exactly(pipe, buffer: memoryview) -> bool:
+    """Fill the whole buffer from the pipe, False when the stream ends first"""
+    filled = 0
+    while filled < len(buffer):
+        read = pipe.readinto(buffer[filled:])
+        if not read:
+            return False
+        filled += read
+    return True
+
+
+class RawFrameReader:
+    """Lets ffmpeg decode only the sampled frames, already scaled and converted.
+
+    Frames are read from the pipe straight into a ring of preallocated buffers, so a
+    yielded frame is valid until `buffer_count` more frames were read. Timestamps are
+    the presentation timestamps ffmpeg reports for every frame.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        frame_size: tuple[int, int],
+        pixel_format: str = "bgr24",
+        buffer_count: int = FRAME_BUFFERS,
+    ) -> None:
+        self.file_path = file_path
+        self.frame_size = frame_size  # width, height
+        self.pixel_format = pixel_format
+
+        width, height = frame_size
+        channels = PIXEL_FORMAT_CHANNELS[pixel_format]
+        # Grey frames are 2D, as OpenCV has them
+        shape = (buffer_count, height, width, *([channels] if channels > 1 else []))
+        self.buffers = np.empty(shape, dtype=np.uint8)
+
+    def read(
+        self, indices: list[int], fps: float, select: str
+    ) -> Iterator[tuple[int, float, np.ndarray]]:
+        """Yield (index, timestamp, frame) of sorted `indices`, which `select` has to pick.
+
+        Decoding starts at the first index, `select` numbers frames from there. Raises
+        `VariableFrameRateError` at the first frame that isn't at `index / fps`, as
+        neither seeking nor `select` find the right frames then.
+        """
+        if not indices:
+            return
+
+        width, height = self.frame_size
+        command = [
+            "ffmpeg",
+            "-hide_banner",
+            "-nostats",
+            # `showinfo` reports timestamps on the info level
+            "-loglevel",
+            "info",
+            # Timestamps stay the ones of the file after seeking
+            "-copyts",
+            # MP4 keeps frames from the given time on, AVI also the one showing then, the
+            # exact time of the first index is the first index in both
+            *(["-ss", str(indices[0] / fps)] if indices[0] else []),
+            "-i",
+            self.file_path,
+            "-map",
+            "0:v:0",
+            "-vf",
+            f"select='{select}',showinfo,scale={width}:{height}:flags=area",
+            *passthrough_options(ffmpeg_version()),
+            # Selected frames go on past the last index when only a part is decoded
+            "-frames:v",
+            str(len(indices)),
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            self.pixel_format,
+            "pipe:1",
+        ]
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        timestamps: queue.Queue[float | None] = queue.Queue()
+        output_lines: deque[bytes] = deque(maxlen=ERROR_LINES)
+        drain = Thread(
+            target=_drain_stderr,
+            args=(process.stderr, timestamps, output_lines),
+            daemon=True,
+        )
+        drain.start()
+
+        try:
+            for i, index in enumerate(indices):
+                frame = self.buffers[i % len(self.buffers)]
+                if not _read_exactly(process.stdout, memoryview(frame).cast("B")):
+                    break
+                # `showinfo` logs every frame before it is sent
+                current_time = timestamps.get()
+                if current_time is None:
+                    break
+                if abs(current_time * fps - index) > 0.5:
+                    raise VariableFrameRateError(
+                        f"Frame {index} is at {current_time}s, not {index / fps}s"
+                    )
+                yield index, current_time, frame
+
+            process.stdout.close()
+            if process.wait() != 0:
+                drain.join()
+                output = b"".join(output_lines).decode(errors="replace")
+                raise RuntimeError(f"ffmpeg failed: {output}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            drain.join()
@@ -0,0 +1,107 @@
+import hashlib
+import os
+
+import cv2
+import numpy as np
+
+from analysis_tool.cache import evict_least_recently_used, touch, write_atomically
+from analysis_tool.model_registry import get_ocr_reader
+from analysis_tool.params import CACHE_PATH
+from analysis_tool.video.frame_source import Detector
+from analysis_tool.video.trackers import SubtitleTracker
+
+# One file per subtitle fingerprint, so workers OCR-ing at once never lose entries
+OCR_CACHE_PATH = os.path.join(CACHE_PATH, "ocr")
+# Least recently used subtitles are removed above this size of the cache
+OCR_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+FINGERPRINT_SIZE = (96, 24)  # width, height
+# Subtitles are white, the background behind them is rarely that bright
+TEXT_BRIGHTNESS_THRESHOLD = 200
+# Fraction of fingerprint pixels that have to flip to treat subtitle as changed
+CHANGED_PIXELS_THRESHOLD = 0.02
+
+
+def subtitle_fingerprint(cropped_grey_frame: np.ndarray) -> np.ndarray:
+    """Downscaled, binarised subtitle region - cheap to compute and compare"""
+    small = cv2.resize(
+        cropped_grey_frame, FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA
+    )
+    return small > TEXT_BRIGHTNESS_THRESHOLD
+
+
+class SubtitleReader(Detector):
+    """OCRs the subtitle region, but only when it changed since the last OCR-ed frame.
+
+    OCR results are memoised by the fingerprint of the region in `cache_path`, so the
+    same subtitles are never read twice, also across runs.
+    """
+
+    def __init__(
+        self,
+        region: tuple[int, int, int, int],
+        cache_path: str = OCR_CACHE_PATH,
+        max_cache_bytes: int = OCR_CACHE_MAX_BYTES,
+    ) -> None:
+        super().__init__(SubtitleTracker())
+        self.region = region
+        self.cache_path = cache_path
+        self.max_cache_bytes = max_cache_bytes
+        # Texts read in this run by fingerprint
+        self.cache: dict[str, str] = {}
+        self.cache_changed = False
+        self.previous_fingerprint: np.ndarray | None = None
+        self.previous_text = ""
+
+    @property
+    def text(self) -> str:
+        return self.tracker.text
+
+    def observe(self, frame: np.ndarray) -> str:
+        x1, y1, x2, y2 = self.region
+        cropped_grey_frame = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+        fingerprint = subtitle_fingerprint(cropped_grey_frame)
+
+        if (
+            self.previous_fingerprint is not None
+            and np.mean(fingerprint != self.previous_fingerprint)
+            <= CHANGED_PIXELS_THRESHOLD
+        ):
+            return self.previous_text
+
+        self.previous_fingerprint = fingerprint
+        self.previous_text = self._read_text(cropped_grey_frame, fingerprint)
+        return self.previous_text
+
+    def finish(self) -> None:
+        if self.cache_changed:
+            evict_least_recently_used(self.cache_path, self.max_cache_bytes, ".txt")
+
+    def _read_text(
+        self, cropped_grey_frame: np.ndarray, fingerprint: np.ndarray
+    ) -> str:
+        # Nothing bright enough to be a subtitle
+        if not fingerprint.any():
+            return ""
+
+        key = hashlib.sha1(np.packbits(fingerprint).tobytes()).hexdigest()
+        if key not in self.cache:
+            self.cache[key] = self._cached_ocr(key, cropped_grey_frame)
+        return self.cache[key]
+
+    def _cached_ocr(self, key: str, cropped_grey_frame: np.ndarray) -> str:
+        path = os.path.join(self.cache_path, f"{key}.txt")
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            touch(path)
+            return text
+        except FileNotFoundError:
+            pass
+
+        result = get_ocr_reader().readtext(cropped_grey_frame)  # OCR
+        text = " ".join([item[1] for item in result])
+        os.makedirs(self.cache_path, exist_ok=True)
+        write_atomically(path, text)
+        self.cache_changed = True
+        return text
@@ -0,0 +1,20 @@
+import cv2
+import numpy as np
+import pytest
+
+from analysis_tool.video.video_parser import VideoParser
+
+
+@pytest.fixture
+def synthetic_video(tmp_path, monkeypatch) -> VideoParser:
+    """10 seconds of 64x48 frames at 30 fps, every frame filled with its own index"""
+    monkeypatch.setattr("analysis_tool.video.video_parser.VIDEO_FILES_PATH", tmp_path)
+
+    writer = cv2.VideoWriter(
+        str(tmp_path / "synthetic.avi"), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48)
+    )
+    for i in range(300):
+        writer.write(np.full((48, 64, 3), i % 256, dtype=np.uint8))
+    writer.release()
+
+    return VideoParser("synthetic.avi")
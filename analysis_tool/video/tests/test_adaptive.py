@@ -0,0 +1,98 @@
+import numpy as np
+
+from analysis_tool.video.adaptive import AdaptiveSampler
+from analysis_tool.video.frame_source import Detector
+from analysis_tool.video.trackers import Tracker
+
+
+class IgnoringTracker(Tracker):
+    def update(self, current_time: float, observation) -> None:
+        pass
+
+
+class BrightnessDetector(Detector):
+    def __init__(self) -> None:
+        super().__init__(IgnoringTracker())
+        self.observed_frames = 0
+
+    def observe(self, frame: np.ndarray) -> float:
+        self.observed_frames += 1
+        return frame.mean()
+
+
+def test_adaptive_sampler_resolves_state_changes_to_fine_interval(synthetic_video):
+    # given
+    detector = BrightnessDetector()
+
+    # when
+    observations = AdaptiveSampler(
+        synthetic_video, detector, state=lambda brightness: brightness > 100
+    ).run()
+
+    # then
+    bright = [round(ts, 1) for ts, brightness in observations if brightness > 100]
+    # Frames are filled with index % 256, so they are bright from 3.4s to 8.5s
+    assert bright[0] == 3.4 and bright[-1] == 8.5
+    assert round(max(ts for ts, b in observations if b <= 100 and ts < 5), 1) == 3.3
+    assert round(min(ts for ts, b in observations if b <= 100 and ts > 5), 1) == 8.6
+    assert detector.observed_frames < 30
+
+
+def test_adaptive_sampler_samples_densely_only_between_requested_samples(
+    synthetic_video,
+):
+    # given
+    detector = BrightnessDetector()
+
+    # when
+    observations = AdaptiveSampler(
+        synthetic_video,
+        detector,
+        state=lambda brightness: False,
+        # Brightness steadily grows, it only jumps where the frame index wraps at 256
+        dense=lambda first, second: abs(second - first) > 100,
+    ).run()
+
+    # then
+    timestamps = [round(ts, 1) for ts, _ in observations]
+    assert [ts for ts in timestamps if 8 <= ts <= 9] == list(
+        np.round(np.arange(8.0, 9.05, 0.1), 1)
+    )
+    assert [ts for ts in timestamps if ts < 8] == list(np.arange(8.0))
+    assert detector.observed_frames < len(synthetic_video.frame_indices(0.1)) / 4
+
+
+class TrackingDetector(BrightnessDetector):
+    tracks_frames = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.events: list[str] = []
+
+    def reset(self) -> None:
+        self.events.append("reset")
+
+    def observe(self, frame: np.ndarray) -> float:
+        self.events.append("observe")
+        return super().observe(frame)
+
+
+def test_adaptive_sampler_resets_tracking_detector_between_distant_samples(
+    synthetic_video,
+):
+    # given
+    detector = TrackingDetector()
+
+    # when
+    AdaptiveSampler(
+        synthetic_video,
+        detector,
+        state=lambda brightness: False,
+        dense=lambda first, second: abs(second - first) > 100,
+    ).run()
+
+    # then
+    # 11 coarse samples are all apart, the 9 samples between 8s and 9s follow each other
+    assert detector.events.count("observe") == 20
+    assert detector.events.count("reset") == 12
+    assert detector.events[-10:] == ["reset", *["observe"] * 9]
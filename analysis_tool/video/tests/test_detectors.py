@@ -0,0 +1,32 @@
+import numpy as np
+
+from analysis_tool.video.detectors import decode_person_boxes
+
+
+def _detection(center_x, center_y, w, h, class_id, confidence) -> np.ndarray:
+    detection = np.zeros(85, dtype=np.float32)
+    detection[:4] = center_x, center_y, w, h
+    detection[5 + class_id] = confidence
+    return detection
+
+
+def test_decode_person_boxes_for_batch():
+    # given
+    person = _detection(0.5, 0.5, 0.2, 0.4, class_id=0, confidence=0.9)
+    weak_person = _detection(0.1, 0.1, 0.1, 0.1, class_id=0, confidence=0.5)
+    dog = _detection(0.3, 0.3, 0.1, 0.1, class_id=16, confidence=0.95)
+    outs = [
+        np.stack([[person, dog], [weak_person, weak_person]]),
+        np.stack([[dog], [person]]),
+    ]
+
+    # when
+    people = decode_person_boxes(
+        outs, batch_size=2, frame_shape=(100, 200, 3), confidence_threshold=0.8
+    )
+
+    # then
+    (first_boxes, first_confidences), (second_boxes, _) = people
+    assert first_boxes.tolist() == [[80, 30, 40, 40]]
+    assert np.allclose(first_confidences, [0.9])
+    assert second_boxes.tolist() == [[80, 30, 40, 40]]
@@ -0,0 +1,35 @@
+import numpy as np
+
+from analysis_tool.video.faces import FaceDetector
+
+
+class RecordingCascade:
+    """Finds one 40x40 face in the middle of every searched image"""
+
+    def __init__(self) -> None:
+        self.searched_shapes: list[tuple[int, ...]] = []
+
+    def detectMultiScale(self, gray_frame: np.ndarray, **kwargs) -> np.ndarray:
+        self.searched_shapes.append(gray_frame.shape)
+        height, width = gray_frame.shape
+        return np.array([[width // 2 - 20, height // 2 - 20, 40, 40]])
+
+
+def test_face_detector_downscales_tracks_roi_and_shares_results(monkeypatch):
+    # given
+    cascade = RecordingCascade()
+    monkeypatch.setattr("analysis_tool.video.faces.get_face_cascade", lambda: cascade)
+    detector = FaceDetector()
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    next_frame = frame.copy()
+
+    # when
+    first_faces = detector.detect(frame)
+    shared_faces = detector.detect(frame)
+    tracked_faces = detector.detect(next_frame)
+
+    # then
+    assert cascade.searched_shapes == [(360, 640), (80, 80)]
+    assert first_faces.tolist() == [[900, 480, 120, 120]]
+    assert shared_faces is first_faces
+    assert tracked_faces.tolist() == [[900, 480, 120, 120]]
@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+from analysis_tool.video.feature_store import (
+    features_path,
+    load_features,
+    save_features,
+)
+from analysis_tool.video.mistakes import replay_observations
+from analysis_tool.video.trackers import DetectionThresholds
+
+FACE = np.array([[10, 10, 50, 50]])
+NO_FACES = np.empty((0, 4), dtype=int)
+TWO_PEOPLE = (np.array([[0, 0, 50, 100], [100, 0, 50, 100]]), np.array([0.9, 0.6]))
+ONE_PERSON = (np.array([[0, 0, 50, 100]]), np.array([0.9]))
+
+OBSERVATIONS = {
+    "other_people": [(0.0, ONE_PERSON), (0.1, TWO_PEOPLE), (0.2, ONE_PERSON)],
+    "turning_away": [
+        (0.0, (FACE, None)),
+        (0.1, (NO_FACES, np.array([[0.5, 0.5]]))),
+        (0.2, (FACE, None)),
+    ],
+    "expressions": [(0.0, None), (0.1, {"happy": 0.95, "neutral": 0.05})],
+    "subtitles": [(0.0, "Dzień dobry"), (0.5, "")],
+}
+
+
+def test_features_round_trip(tmp_path):
+    # given
+    path = str(tmp_path / "features.npz")
+
+    # when
+    save_features(path, OBSERVATIONS)
+    loaded = load_features(path)
+
+    # then
+    assert loaded["subtitles"] == OBSERVATIONS["subtitles"]
+    assert loaded["expressions"][0] == (0.0, None)
+    assert loaded["expressions"][1][1] == {
+        "happy": np.float32(0.95),
+        "neutral": np.float32(0.05),
+    }
+    faces, hands = loaded["turning_away"][1][1]
+    assert faces.shape == (0, 4) and hands.tolist() == [[0.5, 0.5]]
+    assert loaded["turning_away"][0][1][1] is None
+    boxes, scores = loaded["other_people"][1][1]
+    assert boxes.tolist() == TWO_PEOPLE[0].tolist()
+    assert np.allclose(scores, TWO_PEOPLE[1])
+
+
+def test_replay_with_retuned_thresholds(tmp_path):
+    # given
+    path = str(tmp_path / "features.npz")
+    save_features(path, OBSERVATIONS)
+    observations = load_features(path)
+
+    # when
+    default = replay_observations(observations)
+    retuned = replay_observations(
+        observations,
+        DetectionThresholds(person_confidence=0.5, emotion_confidence=0.99),
+    )
+
+    # then
+    assert default["other_people"].mistakes == []
+    assert len(retuned["other_people"].mistakes) == 1
+    assert len(default["expressions"].mistakes) == 1
+    assert retuned["expressions"].mistakes == []
+    assert default["subtitles"].text == "Dzień dobry"
+
+
+def test_features_path_changes_with_video_and_config(tmp_path):
+    # given
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"frames")
+    config = {"detection_interval": 0.1, "frame_size": [960, 540]}
+    path = features_path(str(video), config, str(tmp_path))
+
+    # when
+    same = features_path(str(video), dict(config), str(tmp_path))
+    resampled = features_path(
+        str(video), {**config, "detection_interval": 0.2}, str(tmp_path)
+    )
+    video.write_bytes(b"other frames")
+    os.utime(video, ns=(0, 0))
+    edited = features_path(str(video), config, str(tmp_path))
+
+    # then
+    assert same == path
+    assert len({path, resampled, edited}) == 3
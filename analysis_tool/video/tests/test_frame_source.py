@@ -0,0 +1,70 @@
+import numpy as np
+
+from analysis_tool.video.frame_source import FrameConsumer, FrameSource
+
+
+class RecordingConsumer(FrameConsumer):
+    def __init__(self) -> None:
+        self.timestamps: list[float] = []
+
+    def process(self, frame: np.ndarray, current_time: float) -> None:
+        self.timestamps.append(current_time)
+
+
+def test_frame_source_fans_out_with_separate_intervals(synthetic_video):
+    # given
+    detector = RecordingConsumer()
+    ocr = RecordingConsumer()
+    source = FrameSource(synthetic_video)
+    source.register(detector, 0.1)
+    source.register(ocr, 2)
+
+    # when
+    source.run()
+
+    # then
+    assert len(detector.timestamps) == 100
+    assert len(ocr.timestamps) == 5
+    assert set(ocr.timestamps) <= set(detector.timestamps)
+
+
+def test_frame_indices_with_fractional_fps(synthetic_video):
+    # given
+    synthetic_video.fps = 29.97
+
+    # when
+    indices = synthetic_video.frame_indices(0.1, end=1)
+
+    # then
+    assert indices == [0, 3, 6, 9, 12, 15, 18, 21, 24, 27]
+
+
+def test_sample_frames_reports_presentation_timestamps(synthetic_video):
+    # when
+    samples = list(synthetic_video.sample_frames(2.5, start=1))
+
+    # then
+    assert [round(ts, 3) for ts, _ in samples] == [1, 3.5, 6, 8.5]
+    # Frames are filled with their own index, up to JPEG compression error
+    frame_values = np.array([frame.mean() for _, frame in samples])
+    assert np.allclose(frame_values, [30, 105, 180, 255], atol=2)
+
+
+def test_frame_source_shards_partition_samples(synthetic_video):
+    # given
+    whole = RecordingConsumer()
+    shards = [RecordingConsumer() for _ in range(3)]
+    bounds = [(0, 10 / 3), (10 / 3, 20 / 3), (20 / 3, None)]
+
+    # when
+    source = FrameSource(synthetic_video)
+    source.register(whole, 0.1)
+    source.run()
+
+    for consumer, (start, end) in zip(shards, bounds):
+        source = FrameSource(synthetic_video, start, end)
+        source.register(consumer, 0.1)
+        source.run()
+
+    # then
+    assert [ts for shard in shards for ts in shard.timestamps] == whole.timestamps
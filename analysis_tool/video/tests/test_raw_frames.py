@@ -0,0 +1,155 @@
+import subprocess
+
+import numpy as np
+import pytest
+from hamcrest import assert_that, equal_to
+
+from analysis_tool.video.frame_source import FrameSource
+from analysis_tool.video.raw_frames import (
+    RawFrameReader,
+    ffmpeg_available,
+    grid_select,
+    passthrough_options,
+)
+from analysis_tool.video.video_parser import VideoParser
+
+pytestmark = pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not installed")
+
+
+@pytest.fixture
+def h264_video(tmp_path, monkeypatch) -> VideoParser:
+    """10 seconds of 64x48 H.264 frames at 29.97 fps, every frame filled with its own index"""
+    monkeypatch.setattr("analysis_tool.video.video_parser.VIDEO_FILES_PATH", tmp_path)
+    frames = np.repeat(np.arange(300) % 256, 64 * 48).astype(np.uint8)
+    encoded = subprocess.run(
+        [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "gray",
+            "-s",
+            "64x48",
+            "-r",
+            "30000/1001",
+            "-i",
+            "pipe:0",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            str(tmp_path / "synthetic.mp4"),
+        ],
+        input=frames.tobytes(),
+    )
+    if encoded.returncode != 0:
+        pytest.skip("ffmpeg built without libx264")
+    return VideoParser("synthetic.mp4")
+
+
+@pytest.mark.parametrize("video_fixture", ["synthetic_video", "h264_video"])
+def test_ffmpeg_selects_the_same_frames_as_opencv(video_fixture, request):
+    # given
+    video = request.getfixturevalue(video_fixture)
+    source = FrameSource(video, start=10 / 3)
+    source.register(None, 0.1)
+    source.register(None, 0.5)
+    indices = sorted(set().union(*(indices for _, indices in source.consumers)))
+    select = grid_select(
+        [interval * video.fps for interval in source.intervals], first_frame=indices[0]
+    )
+    reader = RawFrameReader(video.file_path, video.frame_size)
+
+    # when
+    # Read directly, `read_grid_frames` would hide a failure behind the OpenCV fallback
+    ffmpeg_frames = [
+        (index, current_time, frame.mean())
+        for index, current_time, frame in reader.read(indices, video.fps, select)
+    ]
+    opencv_frames = [
+        (index, current_time, frame.mean())
+        for index, current_time, frame in video.read_frames(indices)
+    ]
+
+    # then
+    assert indices[0] > 0
+    assert_that([index for index, _, _ in ffmpeg_frames], equal_to(indices))
+    assert np.allclose(
+        [current_time for _, current_time, _ in ffmpeg_frames],
+        [current_time for _, current_time, _ in opencv_frames],
+    )
+    # Frames are filled with their own index, up to compression error
+    assert np.allclose(
+        [value for _, _, value in ffmpeg_frames],
+        [value for _, _, value in opencv_frames],
+        atol=2,
+    )
+
+
+def test_frames_are_scaled_into_preallocated_buffers(synthetic_video):
+    # given
+    reader = RawFrameReader(
+        synthetic_video.file_path, (32, 24), pixel_format="gray", buffer_count=4
+    )
+
+    # when
+    frames = [
+        frame
+        for _, _, frame in reader.read([0, 1, 2], synthetic_video.fps, select="lt(n,3)")
+    ]
+
+    # then
+    assert_that(frames[0].shape, equal_to((24, 32)))
+    assert all(np.shares_memory(frame, reader.buffers) for frame in frames)
+    assert np.allclose([frame.mean() for frame in frames], [0, 1, 2], atol=2)
+
+
+@pytest.fixture
+def variable_frame_rate_video(tmp_path, monkeypatch) -> VideoParser:
+    """30 fps for the first 2 seconds, then 10 fps"""
+    monkeypatch.setattr("analysis_tool.video.video_parser.VIDEO_FILES_PATH", tmp_path)
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc=size=64x48:rate=30:duration=4,"
+            "setpts='if(lt(N,60),N/30,2+(N-60)/10)/TB'",
+            *passthrough_options((5, 1)),
+            "-c:v",
+            "ffv1",
+            str(tmp_path / "variable.mkv"),
+        ],
+        check=True,
+    )
+    return VideoParser("variable.mkv")
+
+
+def test_variable_frame_rate_falls_back_to_opencv(variable_frame_rate_video):
+    # given
+    video = variable_frame_rate_video
+    indices = [0, 30, 60, 70, 80]
+
+    # when
+    ffmpeg_frames = [
+        (index, current_time)
+        for index, current_time, _ in video.read_grid_frames(indices, [1 / 3])
+    ]
+
+    # then
+    opencv_frames = [
+        (index, current_time) for index, current_time, _ in video.read_frames(indices)
+    ]
+    assert_that(ffmpeg_frames, equal_to(opencv_frames))
+    assert_that([round(t, 1) for _, t in ffmpeg_frames], equal_to([0, 1, 2, 3, 4]))
+
+
+def test_vsync_option_before_fps_mode():
+    assert_that(passthrough_options((4, 4)), equal_to(["-vsync", "passthrough"]))
+    assert_that(passthrough_options((7, 0)), equal_to(["-fps_mode", "passthrough"]))
+    assert_that(passthrough_options(None), equal_to(["-fps_mode", "passthrough"]))
@@ -0,0 +1,78 @@
+import numpy as np
+
+from analysis_tool.video.subtitles import SubtitleReader
+
+REGION = (0, 0, 200, 50)
+
+
+class CountingOcrReader:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def readtext(self, image: np.ndarray) -> list:
+        self.calls += 1
+        return [(None, f"subtitle {self.calls}", 1.0)]
+
+
+def _frame_with_subtitle(position: int, noise: int = 0) -> np.ndarray:
+    frame = np.full((50, 200, 3), 40 + noise, dtype=np.uint8)
+    frame[20:30, position : position + 80] = 255
+    return frame
+
+
+def test_subtitle_reader_skips_ocr_when_subtitle_unchanged(tmp_path, monkeypatch):
+    # given
+    ocr = CountingOcrReader()
+    monkeypatch.setattr("analysis_tool.video.subtitles.get_ocr_reader", lambda: ocr)
+    reader = SubtitleReader(REGION, cache_path=str(tmp_path / "ocr"))
+    frames = [
+        _frame_with_subtitle(10),
+        _frame_with_subtitle(10, noise=5),
+        np.zeros((50, 200, 3), dtype=np.uint8),
+        _frame_with_subtitle(100),
+        _frame_with_subtitle(10),
+    ]
+
+    # when
+    texts = [reader.observe(frame) for frame in frames]
+
+    # then
+    assert texts == ["subtitle 1", "subtitle 1", "", "subtitle 2", "subtitle 1"]
+    assert ocr.calls == 2
+
+
+def test_subtitle_reader_reuses_ocr_cache_between_runs(tmp_path, monkeypatch):
+    # given
+    ocr = CountingOcrReader()
+    monkeypatch.setattr("analysis_tool.video.subtitles.get_ocr_reader", lambda: ocr)
+    cache_path = str(tmp_path / "ocr")
+
+    first_run = SubtitleReader(REGION, cache_path=cache_path)
+    first_run.observe(_frame_with_subtitle(10))
+    first_run.finish()
+
+    # when
+    text = SubtitleReader(REGION, cache_path=cache_path).observe(
+        _frame_with_subtitle(10)
+    )
+
+    # then
+    assert text == "subtitle 1"
+    assert ocr.calls == 1
+
+
+def test_subtitle_reader_bounds_ocr_cache(tmp_path, monkeypatch):
+    # given
+    ocr = CountingOcrReader()
+    monkeypatch.setattr("analysis_tool.video.subtitles.get_ocr_reader", lambda: ocr)
+    cache_path = tmp_path / "ocr"
+    # Room for a single "subtitle N" entry
+    reader = SubtitleReader(REGION, cache_path=str(cache_path), max_cache_bytes=15)
+
+    # when
+    reader.observe(_frame_with_subtitle(10))
+    reader.observe(_frame_with_subtitle(100))
+    reader.finish()
+
+    # then
+    assert [path.read_text() for path in cache_path.iterdir()] == ["subtitle 2"]
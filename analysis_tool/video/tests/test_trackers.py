@@ -0,0 +1,95 @@
+import numpy as np
+from hamcrest import assert_that, contains_exactly, has_properties
+
+from analysis_tool.mistakes.mistakes import MistakeType
+from analysis_tool.video.trackers import (
+    DetectionThresholds,
+    MovingTracker,
+    SecondPersonTracker,
+)
+
+FACE = np.array([[10, 10, 50, 50]])
+NO_FACES = np.empty((0, 4), dtype=int)
+
+
+def _people(count: int) -> tuple[np.ndarray, np.ndarray]:
+    boxes = np.array([[i * 100, 0, 50, 100] for i in range(count)]).reshape(-1, 4)
+    return boxes, np.full(count, 0.9)
+
+
+def test_second_person_tracker_interval():
+    # given
+    observations = [
+        (0.0, _people(1)),
+        (0.1, _people(2)),
+        (0.2, _people(2)),
+        (0.3, _people(1)),
+    ]
+
+    # when
+    mistakes = SecondPersonTracker().replay(observations)
+
+    # then
+    assert_that(
+        mistakes,
+        contains_exactly(
+            has_properties(
+                {"type": MistakeType.SECOND_PLAN_PERSON, "start_ts": 0.1, "end_ts": 0.3}
+            )
+        ),
+    )
+
+
+def test_moving_tracker_turning_away_and_gestures():
+    # given
+    hands = np.array([[0.5, 0.5], [0.6, 0.6]])
+    observations = [
+        (0.0, (FACE, None)),
+        (0.1, (NO_FACES, None)),
+        (0.5, (FACE, hands)),
+        (2.0, (FACE, hands + 0.1)),
+    ]
+
+    # when
+    mistakes = MovingTracker().replay(observations)
+
+    # then
+    assert_that(
+        mistakes,
+        contains_exactly(
+            has_properties(
+                {"type": MistakeType.MOVING, "start_ts": 0.1, "end_ts": 0.5}
+            ),
+            has_properties(
+                {"type": MistakeType.MOVING, "start_ts": 2.0, "confidence": 1}
+            ),
+        ),
+    )
+
+
+def test_moving_tracker_keeps_jittering_face_as_primary():
+    # given
+    jitter = np.array([[3, -4, 6, 5]])
+    observations = [
+        (0.0, (FACE, None)),
+        (0.1, (NO_FACES, None)),
+        (0.5, (FACE + jitter, None)),
+        (0.6, (FACE - jitter, None)),
+    ]
+
+    # when
+    exact_mistakes = MovingTracker(
+        DetectionThresholds(face_position_tolerance=0)
+    ).replay(observations)
+    tolerant_mistakes = MovingTracker().replay(observations)
+
+    # then
+    # Without tolerance every jittered box is a new face, turning away ends a frame late
+    assert_that(
+        exact_mistakes,
+        contains_exactly(has_properties({"start_ts": 0.1, "end_ts": 0.6})),
+    )
+    assert_that(
+        tolerant_mistakes,
+        contains_exactly(has_properties({"start_ts": 0.1, "end_ts": 0.5})),
+    )
@@ -0,0 +1,261 @@
+import difflib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from analysis_tool.mistakes.mistakes import MistakeType, MistakeCategory
+from analysis_tool.mistakes.models import Mistake
+from analysis_tool.params import ANALYSIS_WIDTH
+from analysis_tool.text.alignment import SubtitleCue
+
+
+@dataclass
+class DetectionThresholds:
+    person_confidence: float = 0.8
+    nms: float = 0.4
+    emotion_confidence: float = 0.9
+    hand_movement: float = 0.05
+    # How many pixels the primary face box may move and still be the same face, boxes
+    # found again around the previous face jitter by a few percent of the frame width
+    face_position_tolerance: int = round(0.03 * ANALYSIS_WIDTH)
+
+
+def hand_movement_lengths(previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """How far every hand landmark moved, landmarks are compared pairwise"""
+    compared = min(len(current), len(previous))
+    return np.linalg.norm(current[:compared] - previous[:compared], axis=1)
+
+
+class Tracker(ABC):
+    """Turns per-frame model observations into mistakes, holds the state between frames.
+
+    Trackers don't touch the frames themselves, so observations computed elsewhere
+    (e.g. in worker processes or a feature store) can be replayed through them in time
+    order, also with different thresholds.
+    """
+
+    def __init__(self, thresholds: DetectionThresholds | None = None) -> None:
+        self.thresholds = thresholds or DetectionThresholds()
+        self.mistakes: list[Mistake] = []
+
+    @abstractmethod
+    def update(self, current_time: float, observation) -> None: ...
+
+    def closed_mistakes(self) -> list[Mistake]:
+        """Mistakes that won't be changed by further updates"""
+        return self.mistakes
+
+    def replay(self, observations: list[tuple[float, object]]) -> list[Mistake]:
+        for current_time, observation in observations:
+            self.update(current_time, observation)
+        return self.mistakes
+
+
+class ExpressionsTracker(Tracker):
+    def update(self, current_time: float, emotions: dict[str, float] | None) -> None:
+        if not emotions:
+            return
+
+        strongest_emotion = None
+        max_confidence = 0
+        for emotion_name, confidence in emotions.items():
+            if (
+                confidence > max_confidence
+                and confidence > self.thresholds.emotion_confidence
+                and emotion_name != "neutral"
+            ):
+                strongest_emotion = emotion_name
+                max_confidence = confidence
+
+        if strongest_emotion:
+            self.mistakes.append(
+                Mistake(
+                    type=MistakeType.FACIAL_EXPRESSIONS,
+                    category=MistakeCategory.VIDEO,
+                    confidence=max_confidence,
+                    start_ts=current_time,
+                    end_ts=current_time + 1,
+                    detail=strongest_emotion,
+                )
+            )
+
+
+class SecondPersonTracker(Tracker):
+    def __init__(self, thresholds: DetectionThresholds | None = None) -> None:
+        super().__init__(thresholds)
+        self.other_person_detected = False
+
+    def closed_mistakes(self) -> list[Mistake]:
+        return self.mistakes[:-1] if self.other_person_detected else self.mistakes
+
+    def people_confidences(self, people: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        """Confidences of people left after thresholding and Non-Maximum Suppression"""
+        boxes, confidences = people
+        indices = cv2.dnn.NMSBoxes(
+            boxes.tolist(),
+            confidences.tolist(),
+            self.thresholds.person_confidence,
+            self.thresholds.nms,
+        )
+        return confidences[np.array(indices, dtype=int).flatten()]
+
+    def update(
+        self, current_time: float, people: tuple[np.ndarray, np.ndarray]
+    ) -> None:
+        people_confidences = self.people_confidences(people)
+        people_count = len(people_confidences)
+
+        # When second person enters the frame
+        if people_count > 1 and not self.other_person_detected:
+            self.other_person_detected = True
+            self.mistakes.append(
+                Mistake(
+                    type=MistakeType.SECOND_PLAN_PERSON,
+                    category=MistakeCategory.VIDEO,
+                    start_ts=current_time,
+                    confidence=np.mean(people_confidences),
+                )
+            )
+
+        # When second person leaves the frame
+        if people_count == 1 and self.other_person_detected:
+            self.other_person_detected = False
+            self.mistakes[-1].confidence = (
+                self.mistakes[-1].confidence + np.mean(people_confidences)
+            ) / 2
+            self.mistakes[-1].end_ts = current_time
+
+
+class MovingTracker(Tracker):
+    def __init__(self, thresholds: DetectionThresholds | None = None) -> None:
+        super().__init__(thresholds)
+        self.turning_away = False
+        self.previous_hand_positions = None
+        self.detection_started = False
+        self.primary_face_rect = None  # Track the primary face rectangle
+        self.current_time = None
+
+    def closed_mistakes(self) -> list[Mistake]:
+        # Last mistake gets its end moved when turning away ends, and new turning away
+        # extends it instead of adding a new one until its end passes
+        if self.mistakes and (
+            self.turning_away or self.current_time <= self.mistakes[-1].end_ts
+        ):
+            return self.mistakes[:-1]
+        return self.mistakes
+
+    def update(
+        self, current_time: float, faces_and_hands: tuple[np.ndarray, np.ndarray | None]
+    ) -> None:
+        self.current_time = current_time
+        faces, hand_positions = faces_and_hands
+        self._update_turning_away(faces, current_time)
+        self._update_gestures(hand_positions, current_time)
+
+    def _update_turning_away(self, faces: np.ndarray, current_time: float) -> None:
+        mistakes = self.mistakes
+
+        # Turning Away Logic
+        if len(faces) > 0:
+            # If this is the first detected face, save its rectangle
+            if self.primary_face_rect is None:
+                # Keep the first detected face as primary
+                self.primary_face_rect = faces[0]
+
+            # Check if the primary face is still present
+            found_primary_face = False
+            for x, y, w, h in faces:
+                # Compare the coordinates of the primary face with detected faces
+                if (
+                    np.abs(np.subtract((x, y, w, h), self.primary_face_rect)).max()
+                    <= self.thresholds.face_position_tolerance
+                ):
+                    found_primary_face = True
+                    # Follow the face, so slowly moving speaker stays the primary face
+                    self.primary_face_rect = (x, y, w, h)
+                    self.detection_started = True
+                    if self.turning_away:
+                        self.turning_away = False
+                        # Set end timestamp for turning away
+                        mistakes[-1].end_ts = current_time
+                    break
+
+            # If the primary face is not found anymore
+            if not found_primary_face:
+                self.primary_face_rect = None
+
+        else:
+            if not self.turning_away and self.detection_started:
+                self.turning_away = True
+                if not mistakes or current_time > mistakes[-1].end_ts:
+                    mistakes.append(
+                        Mistake(
+                            type=MistakeType.MOVING,
+                            category=MistakeCategory.VIDEO,
+                            confidence=1,
+                            start_ts=current_time,
+                            end_ts=current_time + 1,
+                        )
+                    )
+
+    def _update_gestures(
+        self, hand_positions: np.ndarray | None, current_time: float
+    ) -> None:
+        mistakes = self.mistakes
+
+        # Reset if no hands detected
+        if hand_positions is None:
+            self.previous_hand_positions = None
+            return
+
+        # Check if hands have moved since the previous frame
+        if self.previous_hand_positions is not None and self.detection_started:
+            movement_lengths = hand_movement_lengths(
+                self.previous_hand_positions, hand_positions
+            )
+            moved = np.flatnonzero(movement_lengths > self.thresholds.hand_movement)
+
+            if len(moved) and (not mistakes or current_time > mistakes[-1].end_ts):
+                mistakes.append(
+                    Mistake(
+                        type=MistakeType.MOVING,
+                        category=MistakeCategory.VIDEO,
+                        confidence=min(movement_lengths[moved[0]] / 0.1, 1),
+                        start_ts=current_time,
+                        end_ts=current_time + 1,
+                    )
+                )
+
+        self.previous_hand_positions = hand_positions
+
+
+class SubtitleTracker(Tracker):
+    """Joins OCR-ed subtitles skipping the ones repeated on consecutive samples"""
+
+    def __init__(self, thresholds: DetectionThresholds | None = None) -> None:
+        super().__init__(thresholds)
+        self.text_from_video: list[str] = []
+        # One per element of `text_from_video`, with the times it was first and last seen
+        self.cues: list[SubtitleCue] = []
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.text_from_video).replace(";", "")
+
+    def update(self, current_time: float, extracted_text: str) -> None:
+        if not extracted_text:
+            return
+
+        last_element = self.text_from_video[-1] if self.text_from_video else ""
+        similarity_ratio = difflib.SequenceMatcher(
+            None, last_element, extracted_text
+        ).ratio()
+
+        # Only append text if it's significantly different
+        if similarity_ratio < 0.95:
+            self.text_from_video.append(extracted_text)
+            self.cues.append(SubtitleCue(extracted_text, current_time, current_time))
+        else:
+            self.cues[-1].end_ts = current_time
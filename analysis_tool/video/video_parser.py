@@ -1,15 +1,28 @@
-import difflib
 import os
-from functools import cache
+from typing import Iterable, Iterator
 
 import cv2
-import easyocr
+import numpy as np
 
-from analysis_tool.params import VIDEO_FILES_PATH, AUDIO_FILES_PATH
+from analysis_tool.params import ANALYSIS_WIDTH, VIDEO_FILES_PATH
+from analysis_tool.text.alignment import SubtitleCue
+from analysis_tool.video.frame_source import FrameSource
+from analysis_tool.video.raw_frames import (
+    RawFrameReader,
+    VariableFrameRateError,
+    ffmpeg_available,
+    grid_select,
+)
+from analysis_tool.video.subtitles import SubtitleReader
 
 
 class VideoParser:
     SUBTITLE_REGION = (470, 830, 1450, 1080)
+    # OCR runs only when subtitles change, so sampling densely is cheap and gives better timing
+    SUBTITLE_INTERVAL = 0.5
+    # Above a typical GOP length seeking to the nearest keyframe beats grabbing every frame
+    MIN_SEEK_GAP = 300  # frames
+    ANALYSIS_WIDTH = ANALYSIS_WIDTH
 
     def __init__(self, file_name: str):
         self.file_name: str = file_name
@@ -25,52 +38,125 @@ class VideoParser:
 
         cap.release()
 
-    @property
-    @cache
-    def ocr_subtitles(self) -> str:
-        return self.extract_subtitles()
-
-    def save_mp3(self) -> str:
-        # -y flag is to always override files
-        file_name_without_extension = "".join(self.file_name.split(".")[:-1])
-        os.system(
-            f"ffmpeg -y -i {self.file_path} {os.path.join(AUDIO_FILES_PATH, file_name_without_extension)}.mp3"
+        # Frames are decoded at this size, detector coordinates are in it as well
+        scale = min(1.0, self.ANALYSIS_WIDTH / self.width) if self.width else 1.0
+        self.frame_size = (
+            round(self.width * scale / 2) * 2,
+            round(self.height * scale / 2) * 2,
         )
-        return f"{file_name_without_extension}.mp3"
 
-    def extract_subtitles(self) -> str:
-        reader = easyocr.Reader(["pl"])
-        cap = cv2.VideoCapture(self.file_path)
-        frame_count = 0
-        text_from_video = []
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            # Process subtitles every 2 seconds
-            if frame_count % (self.fps * 2) != 0:
-                frame_count += 1
-                continue
+        # Filled either by `extract_subtitles` or by a shared `FrameSource` pass
+        self.subtitles: str | None = None
+        self.subtitle_cues: list[SubtitleCue] | None = None
 
-            x1, y1, x2, y2 = self.SUBTITLE_REGION
-            cropped_grey_frame = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
-            result = reader.readtext(cropped_grey_frame)  # OCR
-
-            extracted_text = " ".join([item[1] for item in result])
+    @property
+    def subtitle_region(self) -> tuple[int, int, int, int]:
+        """`SUBTITLE_REGION` in coordinates of the decoded frames"""
+        scale = self.frame_size[0] / self.width
+        return tuple(round(coordinate * scale) for coordinate in self.SUBTITLE_REGION)
 
-            if extracted_text:
-                last_element = text_from_video[-1] if text_from_video else ""
-                similarity_ratio = difflib.SequenceMatcher(
-                    None, last_element, extracted_text
-                ).ratio()
+    @property
+    def ocr_subtitles(self) -> str:
+        if self.subtitles is None:
+            self.extract_subtitles()
+        return self.subtitles
 
-                # Only append text if it's significantly different
-                if similarity_ratio < 0.95:
-                    text_from_video.append(extracted_text)
+    @property
+    def ocr_subtitle_cues(self) -> list[SubtitleCue]:
+        if self.subtitle_cues is None:
+            self.extract_subtitles()
+        return self.subtitle_cues
+
+    def frame_indices(
+        self, interval: float, start: float = 0, end: float | None = None
+    ) -> list[int]:
+        """Indices of frames closest to every `interval` seconds between `start` and `end`"""
+        end = self.duration if end is None else min(end, self.duration)
+        sample_count = max(0, int(np.ceil((end - start) / interval)))
+        # Rounded half up, the same as frames picked by ffmpeg in `read_grid_frames`
+        positions = start * self.fps + np.arange(sample_count) * (interval * self.fps)
+        indices = np.unique(np.floor(positions + 0.5).astype(int))
+        return indices[indices < self.frame_count].tolist()
+
+    def sample_frames(
+        self, interval: float, start: float = 0, end: float | None = None
+    ) -> Iterator[tuple[float, np.ndarray]]:
+        """Yield (presentation timestamp in seconds, frame) every `interval` seconds"""
+        for _, current_time, frame in self.read_frames(
+            self.frame_indices(interval, start, end)
+        ):
+            yield current_time, frame
+
+    def read_grid_frames(
+        self, indices: list[int], intervals: list[float]
+    ) -> Iterator[tuple[int, float, np.ndarray]]:
+        """Decode sorted `indices`, which are all `frame_indices` of `intervals` in some range.
+
+        ffmpeg selects, scales and converts the frames itself, so full resolution frames
+        never reach Python. Without ffmpeg, or when the frame rate of the video turns out
+        to be variable, the frames are read by OpenCV.
+        """
+        if not ffmpeg_available():
+            yield from self.read_frames(indices)
+            return
+
+        select = grid_select(
+            [interval * self.fps for interval in intervals],
+            first_frame=indices[0] if indices else 0,
+        )
+        reader = RawFrameReader(self.file_path, self.frame_size)
+        read = 0
+        try:
+            for frame in reader.read(indices, self.fps, select):
+                yield frame
+                read += 1
+        except VariableFrameRateError:
+            yield from self.read_frames(indices[read:])
+
+    def read_frames(
+        self, indices: Iterable[int]
+    ) -> Iterator[tuple[int, float, np.ndarray]]:
+        """Decode only the frames at sorted `indices`, the ones in between are grabbed or seeked over"""
+        cap = cv2.VideoCapture(self.file_path)
+        position = 0  # Index of the next frame the decoder will return
+
+        try:
+            for index in indices:
+                if index - position > self.MIN_SEEK_GAP:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                    position = index
+
+                # grab() decodes without converting to BGR, so skipped frames are cheap
+                while position < index:
+                    if not cap.grab():
+                        return
+                    position += 1
+
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                position += 1
+
+                current_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if frame.shape[1::-1] != self.frame_size:
+                    frame = cv2.resize(
+                        frame, self.frame_size, interpolation=cv2.INTER_AREA
+                    )
+                yield index, current_time, frame
+        finally:
+            cap.release()
 
-            frame_count += 1
+    @property
+    def audio_file_name(self) -> str:
+        """Name of the mp3 in `AUDIO_FILES_PATH` the audio is extracted to"""
+        file_name_without_extension = "".join(self.file_name.split(".")[:-1])
+        return f"{file_name_without_extension}.mp3"
 
-        cap.release()
-        return " ".join(text_from_video).replace(";", "")
+    def extract_subtitles(self) -> str:
+        subtitle_reader = SubtitleReader(self.subtitle_region)
+        source = FrameSource(self)
+        source.register(subtitle_reader, self.SUBTITLE_INTERVAL)
+        source.run()
+        self.subtitles = subtitle_reader.text
+        self.subtitle_cues = subtitle_reader.tracker.cues
+        return self.subtitles
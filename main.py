@@ -1,7 +1,8 @@
-from analysis_tool.audio.openai_api import OpenAISpeechToText
-from analysis_tool.audio.volume_analyzer import get_max_min_volumes
+import sys
 
-# OpenAISpeechToText().generate_transcription("odwracanie_sie__przerywniki__zmiana_tematu_wypowiedzi")
-# get_max_min_volumes("odwracanie_sie__przerywniki__zmiana_tematu_wypowiedzi")
-OpenAISpeechToText().generate_transcription("za_duzo_liczb__drugi_plan__odwracanie_sie")
+from analysis_tool.mistakes.extract_mistakes import extract_mistakes_from_video
 
+if __name__ == "__main__":
+    # Usage: python main.py <file name from video_files>
+    for mistake in extract_mistakes_from_video(sys.argv[1]):
+        print(mistake)